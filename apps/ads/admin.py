@@ -1,61 +1,111 @@
 from django.contrib import admin
+from django.core.cache import cache
+from django.db import transaction
 
-from .models import Image, Comment, Like, View, Bookmark, Report
+from .generic import prefetch_content_objects
+from .models import (
+    Image, Comment, Like, View, Bookmark, Report, Rating, ExchangeRate, EngagementCounter, ModerationItem,
+    EXCHANGE_RATES_CACHE_KEY,
+)
+from .tasks import recompute_prices
 
 
-@admin.register(Image)
-class ImageAdmin(admin.ModelAdmin):
-    list_display = ('id', 'content_type', 'object_id', 'image', 'created_at')
-    search_fields = ('content_type__model',)
+class GenericObjectAdmin(admin.ModelAdmin):
+    """Resolves content types and ``content_object`` targets per page instead of per row."""
+
     readonly_fields = ('content_object',)
 
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        changelist.result_list = prefetch_content_objects(changelist.result_list)
+        return changelist
+
+    def get_object(self, request, object_id, from_field=None):
+        obj = super().get_object(request, object_id, from_field)
+        if obj is not None:
+            prefetch_content_objects([obj])
+        return obj
+
     def content_object(self, obj):
         return obj.content_object
 
 
+@admin.register(Image)
+class ImageAdmin(GenericObjectAdmin):
+    list_display = ('id', 'content_type', 'object_id', 'content_object', 'image', 'created_at')
+    list_select_related = ('image',)
+    search_fields = ('content_type__model',)
+
+
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'content_type', 'object_id', 'comment', 'created_at')
+class CommentAdmin(GenericObjectAdmin):
+    list_display = ('id', 'user', 'content_type', 'object_id', 'content_object', 'comment', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('comment', 'user__first_name', 'user__last_name')
     list_filter = ('created_at',)
-    readonly_fields = ('content_object',)
-
-    def content_object(self, obj):
-        return obj.content_object
 
 
 @admin.register(Like)
-class LikeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'content_type', 'object_id', 'created_at')
-    readonly_fields = ('content_object',)
-
-    def content_object(self, obj):
-        return obj.content_object
+class LikeAdmin(GenericObjectAdmin):
+    list_display = ('id', 'user', 'content_type', 'object_id', 'content_object', 'created_at')
+    list_select_related = ('user',)
 
 
 @admin.register(View)
-class ViewAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'content_type', 'object_id', 'created_at')
-    readonly_fields = ('content_object',)
-
-    def content_object(self, obj):
-        return obj.content_object
+class ViewAdmin(GenericObjectAdmin):
+    list_display = ('id', 'user', 'content_type', 'object_id', 'content_object', 'created_at')
+    list_select_related = ('user',)
 
 
 @admin.register(Bookmark)
-class BookmarkAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'content_type', 'object_id', 'created_at')
-    readonly_fields = ('content_object',)
-
-    def content_object(self, obj):
-        return obj.content_object
+class BookmarkAdmin(GenericObjectAdmin):
+    list_display = ('id', 'user', 'content_type', 'object_id', 'content_object', 'created_at')
+    list_select_related = ('user',)
 
 
 @admin.register(Report)
-class ReportAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'content_type', 'object_id', 'reason', 'created_at')
+class ReportAdmin(GenericObjectAdmin):
+    list_display = ('id', 'user', 'content_type', 'object_id', 'content_object', 'reason', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('reason',)
-    readonly_fields = ('content_object',)
 
-    def content_object(self, obj):
-        return obj.content_object
+
+@admin.register(Rating)
+class RatingAdmin(GenericObjectAdmin):
+    list_display = ('id', 'user', 'content_type', 'object_id', 'content_object', 'rating', 'created_at')
+    list_select_related = ('user',)
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ('id', 'currency', 'rate', 'updated_at')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+
+        def rate_changed():
+            # like update_exchange_rates: drop the cached rates and renormalize the prices
+            cache.delete(EXCHANGE_RATES_CACHE_KEY)
+            recompute_prices.delay(obj.currency)
+
+        transaction.on_commit(rate_changed)
+
+    def has_delete_permission(self, request, obj=None):
+        # without a rate price_base can't be recomputed, it would keep the last converted value
+        return False
+
+
+@admin.register(EngagementCounter)
+class EngagementCounterAdmin(GenericObjectAdmin):
+    list_display = ('id', 'content_type', 'object_id', 'content_object', 'likes', 'views', 'bookmarks', 'comments', 'reports',
+                    'rating_count', 'updated_at')
+
+
+@admin.register(ModerationItem)
+class ModerationItemAdmin(GenericObjectAdmin):
+    list_display = ('id', 'kind', 'status', 'content_type', 'object_id', 'content_object', 'claimed_by',
+                    'lease_expires_at', 'resolved_by', 'created_at')
+    list_select_related = ('claimed_by', 'resolved_by')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('content_object', 'claimed_by', 'lease_expires_at', 'resolved_by', 'resolved_at')
+    raw_id_fields = ('report',)
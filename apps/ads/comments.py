@@ -0,0 +1,83 @@
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from apps.ads.models import Comment
+from apps.common.paginations import KeysetPagination
+
+
+def top_level_comments(content_type, object_id):
+    return Comment.objects.filter(content_type=content_type, object_id=object_id, depth=0)
+
+
+def thread(root_id):
+    """Whole thread depth-first, one range scan on the ``(root, path)`` index."""
+    return (
+        Comment.objects.filter(root_id=root_id)
+        .select_related("user", "user__avatar")
+        .prefetch_related("user__avatar__derivatives")
+        .order_by("path")
+    )
+
+
+def with_replies(roots, replies):
+    """
+    Top-level comments of ``roots`` (a sliced queryset) each with its first ``replies`` replies
+    in thread order, fetched with a single query.
+
+    Every root gets ``preview`` (list of replies) and ``reply_count`` (size of the whole thread).
+    """
+    rows = (
+        Comment.objects
+        .filter(root_id__in=roots.values("id"))
+        .annotate(
+            position=Window(RowNumber(), partition_by=F("root_id"), order_by=F("path").asc()),
+            thread_size=Window(Count("id"), partition_by=F("root_id")),
+        )
+        .filter(position__lte=replies + 1)
+        .select_related("user", "user__avatar")
+        .prefetch_related("user__avatar__derivatives")
+        # the order of the page (CommentThreadPagination); replies are put in thread order below
+        .order_by("-created_at", "-id")
+    )
+
+    top_level, previews = [], {}
+    for comment in rows:
+        if comment.depth == 0:
+            comment.reply_count = comment.thread_size - 1
+            top_level.append(comment)
+        else:
+            previews.setdefault(comment.root_id, []).append(comment)
+    for comment in top_level:
+        comment.preview = sorted(previews.get(comment.id, []), key=lambda reply: reply.path)
+    return top_level
+
+
+class CommentThreadPagination(KeysetPagination):
+    """Keyset pages of top-level comments (newest first), each loaded together with its first replies."""
+
+    page_size = 20
+    replies_query_param = 'replies'
+    default_replies = 3
+    max_replies = 20
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = ("-created_at", "-id")
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.cursor_filter(queryset.model, self.decode_cursor(cursor)))
+
+        try:
+            replies = int(request.query_params.get(self.replies_query_param, self.default_replies))
+        except ValueError:
+            replies = self.default_replies
+        replies = min(max(replies, 0), self.max_replies)
+
+        roots = with_replies(queryset[:self.page_size + 1], replies)
+        roots.sort(key=lambda comment: (comment.created_at, comment.id), reverse=True)
+        self.has_next = len(roots) > self.page_size
+        self.page = roots[:self.page_size]
+        return self.page
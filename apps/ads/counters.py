@@ -0,0 +1,165 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum
+from django.utils import timezone
+
+from apps.ads.models import Bookmark, Comment, EngagementCounter, Like, Rating, Report, View
+
+# engagement model -> counter field incremented by one per row
+COUNTED_MODELS = {
+    Like: "likes",
+    View: "views",
+    Bookmark: "bookmarks",
+    Comment: "comments",
+    Report: "reports",
+}
+RATING_BUCKETS = tuple(f"rating_{stars}" for stars in range(1, 6))
+COUNTER_FIELDS = (*COUNTED_MODELS.values(), "rating_sum", "rating_count", *RATING_BUCKETS)
+
+RATING_PRIOR_CACHE_KEY = "ads:rating_prior:{content_type_id}"
+
+
+def rating_prior(content_type_id):
+    """Mean rating of all objects of this type, refreshed by recompute_rating_scores."""
+    mean = cache.get(RATING_PRIOR_CACHE_KEY.format(content_type_id=content_type_id))
+    return settings.RATING_PRIOR_MEAN if mean is None else mean
+
+
+def rating_score(content_type_id, rating_sum, rating_count):
+    """Bayesian average as an expression over (new) ``rating_sum`` / ``rating_count`` values."""
+    weight = settings.RATING_PRIOR_WEIGHT
+    return ExpressionWrapper(
+        (weight * rating_prior(content_type_id) + rating_sum) / (weight + rating_count),
+        output_field=FloatField(),
+    )
+
+
+def bump(content_type_id, object_id, **deltas):
+    """Atomically add ``deltas`` to the object's counters, creating the row on first use."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    counters = EngagementCounter.objects.filter(content_type_id=content_type_id, object_id=object_id)
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if "rating_sum" in deltas or "rating_count" in deltas:
+        changes["rating_score"] = rating_score(
+            content_type_id, changes.get("rating_sum", F("rating_sum")), changes.get("rating_count", F("rating_count"))
+        )
+    if counters.update(**changes, updated_at=timezone.now()):
+        return
+    # ON CONFLICT DO NOTHING keeps a concurrent first insert from aborting the transaction
+    EngagementCounter.objects.bulk_create(
+        [EngagementCounter(content_type_id=content_type_id, object_id=object_id)], ignore_conflicts=True
+    )
+    counters.update(**changes, updated_at=timezone.now())
+
+
+def bump_rows(model, rows, sign):
+    """Apply +1/-1 per engagement row, ``rows`` being ``(content_type_id, object_id, rating)`` tuples."""
+    grouped = defaultdict(lambda: defaultdict(int))
+    for content_type_id, object_id, rating in rows:
+        deltas = grouped[content_type_id, object_id]
+        if model is Rating:
+            deltas["rating_sum"] += sign * rating
+            deltas["rating_count"] += sign
+            deltas[f"rating_{rating}"] += sign
+        else:
+            deltas[COUNTED_MODELS[model]] += sign
+    for (content_type_id, object_id), deltas in grouped.items():
+        bump(content_type_id, object_id, **deltas)
+
+
+def recount(model, content_type_id, object_ids):
+    """Overwrite one counter of the given objects with the exact number of ``model`` rows, e.g. after a bulk insert."""
+    field = COUNTED_MODELS[model]
+    totals = dict.fromkeys(object_ids, 0)
+    rows = model.objects.filter(content_type_id=content_type_id, object_id__in=object_ids)
+    totals.update(rows.values_list("object_id").annotate(total=Count("id")).order_by())
+    EngagementCounter.objects.bulk_create(
+        [
+            EngagementCounter(content_type_id=content_type_id, object_id=object_id, **{field: total})
+            for object_id, total in totals.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["content_type", "object_id"],
+        update_fields=[field, "updated_at"],
+    )
+
+
+def get_counters(content_type, object_ids):
+    """``{object_id: EngagementCounter}`` for many objects in one query."""
+    counters = EngagementCounter.objects.filter(content_type=content_type, object_id__in=object_ids)
+    return {counter.object_id: counter for counter in counters}
+
+
+def expected_counters(content_type=None):
+    """``{(content_type_id, object_id): {field: value}}`` computed from the live engagement rows."""
+    expected = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for model, field in COUNTED_MODELS.items():
+        queryset = model.objects.all()
+        if content_type is not None:
+            queryset = queryset.filter(content_type=content_type)
+        rows = queryset.values("content_type_id", "object_id").annotate(total=Count("id")).order_by()
+        for row in rows.iterator(chunk_size=10000):
+            expected[row["content_type_id"], row["object_id"]][field] = row["total"]
+
+    queryset = Rating.objects.all()
+    if content_type is not None:
+        queryset = queryset.filter(content_type=content_type)
+    rows = queryset.values("content_type_id", "object_id").annotate(
+        total=Sum("rating"),
+        votes=Count("id"),
+        **{bucket: Count("id", filter=Q(rating=stars)) for stars, bucket in enumerate(RATING_BUCKETS, 1)},
+    ).order_by()
+    for row in rows.iterator(chunk_size=10000):
+        counters = expected[row["content_type_id"], row["object_id"]]
+        counters["rating_sum"], counters["rating_count"] = row["total"], row["votes"]
+        for bucket in RATING_BUCKETS:
+            counters[bucket] = row[bucket]
+    return expected
+
+
+def recompute_rating_scores(content_type_id=None):
+    """Refresh the prior (mean rating per type) and rewrite every score with one UPDATE per type."""
+    counters = EngagementCounter.objects.all()
+    if content_type_id is not None:
+        counters = counters.filter(content_type_id=content_type_id)
+    totals = counters.values("content_type_id").annotate(total=Sum("rating_sum"), votes=Sum("rating_count")).order_by()
+
+    updated = 0
+    for row in totals:
+        if row["votes"]:
+            cache.set(
+                RATING_PRIOR_CACHE_KEY.format(content_type_id=row["content_type_id"]),
+                row["total"] / row["votes"],
+                None,
+            )
+        updated += EngagementCounter.objects.filter(content_type_id=row["content_type_id"]).update(
+            rating_score=rating_score(row["content_type_id"], F("rating_sum"), F("rating_count"))
+        )
+    return updated
+
+
+def rating_summaries(objects):
+    """``{pk: summary}`` with count, average, score and histogram of many objects, one query per type."""
+    by_content_type = defaultdict(list)
+    for obj in objects:
+        by_content_type[ContentType.objects.get_for_model(obj)].append(obj.pk)
+
+    summaries = {}
+    for content_type, object_ids in by_content_type.items():
+        for object_id, counter in get_counters(content_type, object_ids).items():
+            summaries[object_id] = {
+                "count": counter.rating_count,
+                "average": counter.rating_average,
+                "score": round(counter.rating_score, 3) if counter.rating_count else None,
+                "histogram": counter.rating_histogram,
+            }
+    return summaries
+
+
+def empty_rating_summary():
+    return {"count": 0, "average": None, "score": None, "histogram": [0] * 5}
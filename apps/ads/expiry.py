@@ -0,0 +1,77 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+
+from apps.ads.models import AdsStatus, ads_models
+from apps.common.utils import tashkent_now
+
+EXPIRY_METRICS_CACHE_KEY = "ads:expiry:last_run"
+
+# name -> (date field, condition of the state that expires, changes applied when it does);
+# each condition matches the partial index on the date field declared in Ads.Meta
+EXPIRY_RULES = {
+    "vip": ("vip_expiry_date", Q(is_vip=True), {"is_vip": False}),
+    "top": ("top_expiry_date", Q(is_top=True), {"is_top": False}),
+    "lifetime": ("expiry_date", Q(status=AdsStatus.ACTIVE), {"status": AdsStatus.TIME_DEACTIVE}),
+}
+
+# sent with ``pks`` of the ads whose ``rule`` expired, the UPDATEs bypass post_save
+expired = Signal()
+
+
+def expire_batch(model, rule, now, batch_size):
+    """
+    Expire up to ``batch_size`` due ads in a short transaction of its own and return their pks.
+
+    Rows are claimed with ``FOR UPDATE SKIP LOCKED``, so an overlapping run or a user editing
+    an ad never waits on this one; a claimed row still matches the condition, so reruns are no-ops.
+    """
+    field, condition, changes = EXPIRY_RULES[rule]
+    manager = model.all_objects
+    with transaction.atomic():
+        pks = list(
+            manager.filter(condition, **{f"{field}__lte": now})
+            .order_by(field)
+            .select_for_update(skip_locked=True)
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if pks:
+            manager.filter(pk__in=pks).update(**changes, updated_at=now)
+    if pks:
+        expired.send(sender=model, pks=pks, rule=rule)
+    return pks
+
+
+def expire(now=None, batch_size=1000, max_batches=50):
+    """
+    Run every rule over every ads model; at most ``max_batches`` batches per rule and model,
+    anything left over is picked up by the next run. Returns (and caches) the run's metrics.
+    """
+    now = now or tashkent_now()
+    started = time.perf_counter()
+    counts = dict.fromkeys(EXPIRY_RULES, 0)
+    batches, backlog = 0, False
+
+    for model in ads_models():
+        for rule in EXPIRY_RULES:
+            for _ in range(max_batches):
+                pks = expire_batch(model, rule, now, batch_size)
+                batches += 1
+                counts[rule] += len(pks)
+                if len(pks) < batch_size:
+                    break
+            else:
+                backlog = True
+
+    metrics = {
+        "started_at": now.isoformat(),
+        "expired": counts,
+        "batches": batches,
+        "backlog": backlog,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    cache.set(EXPIRY_METRICS_CACHE_KEY, metrics, None)
+    return metrics
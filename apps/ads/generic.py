@@ -0,0 +1,41 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import prefetch_related_objects
+
+
+_warmed = False
+
+
+def warm_content_types():
+    """Load the ContentType of every installed model into Django's per-process cache with one query."""
+    global _warmed
+    content_types = ContentType.objects.get_for_models(*apps.get_models())
+    _warmed = True
+    return content_types
+
+
+def content_type_for_id(content_type_id):
+    """Cached ContentType lookup; the first call in a process warms the whole map."""
+    if not _warmed:
+        warm_content_types()
+    return ContentType.objects.get_for_id(content_type_id)
+
+
+def prefetch_content_objects(rows, field="content_object"):
+    """
+    Resolve the generic foreign key of many rows at once.
+
+    Content types come from the warm cache instead of one query (or join) per row, and the
+    targets are loaded with one query per target model; returns ``rows`` as a list.
+    """
+    rows = list(rows)
+    if not rows:
+        return rows
+    generic_field = rows[0]._meta.get_field(field)
+    content_type_field = rows[0]._meta.get_field(generic_field.ct_field)
+    for row in rows:
+        content_type_id = getattr(row, content_type_field.attname)
+        if content_type_id is not None and not content_type_field.is_cached(row):
+            content_type_field.set_cached_value(row, content_type_for_id(content_type_id))
+    prefetch_related_objects(rows, field)
+    return rows
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.ads.models import ads_models
+from apps.common.geo import geohash_encode
+from apps.common.utils import chunked
+
+
+class Command(BaseCommand):
+    help = "Fill in the geohash of ads that have coordinates but no (or an outdated) geohash"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--all", action="store_true", help="Recompute every geohash, not only missing ones")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        for model in ads_models():
+            queryset = model.all_objects.filter(latitude__isnull=False, longitude__isnull=False)
+            if not options["all"]:
+                queryset = queryset.filter(geohash__isnull=True)
+
+            updated = 0
+            rows = queryset.only("pk", "latitude", "longitude", "geohash").order_by("pk")
+            for batch in chunked(rows.iterator(chunk_size=batch_size), batch_size):
+                for obj in batch:
+                    obj.geohash = geohash_encode(obj.latitude, obj.longitude)
+                model.all_objects.bulk_update(batch, ["geohash"])
+                updated += len(batch)
+                self.stdout.write(self.style.HTTP_NOT_MODIFIED(f"{model.__name__}: {updated} rows"))
+        self.stdout.write(self.style.SUCCESS("geohashes successfully updated"))
@@ -0,0 +1,96 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from apps.ads.comments import thread, top_level_comments, with_replies
+from apps.ads.models import Comment
+from apps.common.utils import chunked, tashkent_now
+from apps.estate.models import Estate
+from apps.user.models import User
+
+BENCHMARK_USERNAME = "comment-benchmark"
+
+
+class Command(BaseCommand):
+    help = "Seed a discussion with thousands of comments and compare tree loading strategies"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--comments", type=int, default=5000)
+        parser.add_argument("--roots", type=int, default=200, help="Top-level comments among --comments")
+        parser.add_argument("--object-id", help="Benchmark an existing discussion instead of seeding one")
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        content_type = ContentType.objects.get_for_model(Estate)
+        if options["object_id"]:
+            object_id = uuid.UUID(options["object_id"])
+        else:
+            object_id = self.seed(content_type, options["comments"], options["roots"])
+
+        roots = top_level_comments(content_type, object_id).order_by("-created_at", "-id")
+        biggest = (
+            Comment.objects.filter(content_type=content_type, object_id=object_id)
+            .values_list("root_id").annotate(size=Count("id")).order_by("-size").first()
+        )
+        self.stdout.write(f"{Comment.objects.filter(object_id=object_id).count()} comments on {object_id}")
+
+        self.measure("page + 3 replies, one query", options["repeat"], lambda: with_replies(roots[:21], 3))
+        self.measure("page + nested replies, naive", options["repeat"], lambda: self.naive(roots[:20]))
+        if biggest:
+            self.measure("whole biggest thread (path)", options["repeat"], lambda: list(thread(biggest[0])))
+
+    def seed(self, content_type, count, root_count):
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        object_id = uuid.uuid4()
+        moment = tashkent_now() - timedelta(days=30)
+
+        comments = []
+        for number in range(count):
+            moment += timedelta(seconds=random.randint(1, 300))
+            # a fresh thread at first, later mostly replies, preferring recent comments (deep chains)
+            parent = None
+            if comments and number >= root_count // 2 and random.random() > root_count / count:
+                parent = comments[-random.randint(1, min(len(comments), 50))]
+            comment = Comment(
+                user=user, content_type=content_type, object_id=object_id, parent=parent, comment=f"Comment {number}"
+            )
+            comment.set_path(now=moment)
+            comment.created_at = moment
+            comments.append(comment)
+
+        started = time.perf_counter()
+        for batch in chunked(comments, 2000):
+            Comment.objects.bulk_create(batch)
+        # created_at is auto_now_add, restore the simulated timeline
+        Comment.objects.bulk_update(comments, ["created_at"], batch_size=2000)
+        self.stdout.write(f"{count} comments seeded in {time.perf_counter() - started:.1f}s")
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Comment._meta.db_table}")
+        return object_id
+
+    @staticmethod
+    def naive(roots):
+        """The old way: one query for the page, then one per level following ``parent``."""
+        level = list(roots)
+        loaded = list(level)
+        while level:
+            level = list(Comment.objects.filter(parent__in=[comment.id for comment in level]).select_related("user"))
+            loaded.extend(level)
+        return loaded
+
+    def measure(self, title, repeat, function):
+        with CaptureQueriesContext(connection) as queries:
+            rows = len(function())
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        elapsed = (time.perf_counter() - started) / repeat
+        self.stdout.write(f"{title:>30}: {elapsed * 1000:.2f} ms, {len(queries)} queries, {rows} rows")
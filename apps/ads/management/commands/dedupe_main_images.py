@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from apps.ads.models import Image
+from apps.common.utils import tashkent_now
+
+
+class Command(BaseCommand):
+    help = "Keep only the newest main image per object, so the unique_main_image constraint can be created"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many images would be demoted")
+
+    def handle(self, *args, **options):
+        ranked = Image.all_objects.filter(is_main=True, is_deleted=False).annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F("content_type"), F("object_id")],
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        extra = list(ranked.filter(rank__gt=1).values_list("pk", flat=True))
+        if not options["dry_run"]:
+            Image.all_objects.filter(pk__in=extra).update(is_main=False, updated_at=tashkent_now())
+
+        verb = "would be demoted" if options["dry_run"] else "demoted"
+        self.stdout.write(self.style.SUCCESS(f"{len(extra)} extra main images {verb}"))
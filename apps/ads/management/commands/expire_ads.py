@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.ads.expiry import expire
+
+
+class Command(BaseCommand):
+    help = "Turn off expired VIP/TOP promotions and expire ads past their lifetime"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--max-batches", type=int, default=1000, help="Per rule and model")
+
+    def handle(self, *args, **options):
+        metrics = expire(batch_size=options["batch_size"], max_batches=options["max_batches"])
+        expired = ", ".join(f"{rule}: {count}" for rule, count in metrics["expired"].items())
+        self.stdout.write(f"expired {expired} in {metrics['batches']} batches, {metrics['elapsed_ms']} ms")
+        if metrics["backlog"]:
+            self.stdout.write(self.style.WARNING("batch limit reached, run again to finish"))
+        else:
+            self.stdout.write(self.style.SUCCESS("expiry successfully processed"))
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.ads.models import Comment, COMMENT_MAX_DEPTH, comment_path_segment
+from apps.common.utils import chunked
+
+
+class Command(BaseCommand):
+    help = "Compute root/path/depth of all comments from their parents, e.g. for comments created before threading"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = {
+            pk: (parent_id, created_at)
+            for pk, parent_id, created_at in Comment.all_objects.values_list("id", "parent_id", "created_at")
+        }
+
+        trees = {}  # pk -> (parent_id, root_id, path, depth)
+
+        def resolve(pk):
+            chain, seen = [], set()
+            while pk not in trees and pk not in seen:
+                chain.append(pk)
+                seen.add(pk)
+                parent_id = rows[pk][0]
+                if parent_id is None or parent_id not in rows:
+                    break
+                pk = parent_id
+            for pk in reversed(chain):
+                parent_id, created_at = rows[pk]
+                segment = comment_path_segment(created_at, pk)
+                parent = trees.get(parent_id)
+                # same rule as Comment.set_path for threads deeper than the path can hold
+                while parent is not None and parent[3] >= COMMENT_MAX_DEPTH - 1:
+                    parent_id = parent[0]
+                    parent = trees.get(parent_id)
+                if parent is None:
+                    trees[pk] = (None, pk, segment, 0)
+                else:
+                    trees[pk] = (parent_id, parent[1], parent[2] + segment, parent[3] + 1)
+
+        for pk in rows:
+            resolve(pk)
+
+        updated = 0
+        with transaction.atomic():
+            for batch in chunked(trees.items(), options["batch_size"]):
+                comments = [
+                    Comment(id=pk, parent_id=parent_id, root_id=root_id, path=path, depth=depth)
+                    for pk, (parent_id, root_id, path, depth) in batch
+                ]
+                Comment.all_objects.bulk_update(comments, ["parent", "root", "path", "depth"])
+                updated += len(comments)
+                self.stdout.write(self.style.HTTP_NOT_MODIFIED(f"{updated} comments updated"))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{updated} comment paths rebuilt in {time.perf_counter() - started:.1f}s")
+        )
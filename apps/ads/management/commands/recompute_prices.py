@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.ads.models import Currency
+from apps.ads.tasks import recompute_prices
+
+
+class Command(BaseCommand):
+    help = "Recalculate the normalized (base currency) price of all ads, e.g. to backfill price_base"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        for currency in Currency:
+            updated = recompute_prices(currency, options["batch_size"])
+            self.stdout.write(f"{currency.label}: {updated} ads updated")
+        self.stdout.write(self.style.SUCCESS("prices successfully recomputed"))
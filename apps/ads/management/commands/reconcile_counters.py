@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.ads.counters import COUNTER_FIELDS, expected_counters, recompute_rating_scores
+from apps.ads.models import EngagementCounter
+from apps.common.utils import chunked
+
+
+class Command(BaseCommand):
+    help = "Recompute engagement counters from the like/view/bookmark/comment/report/rating tables and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", help="Only objects of this model, as app_label.ModelName, e.g. estate.Estate")
+        parser.add_argument("--dry-run", action="store_true", help="Only report the drift")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        content_type = None
+        if options["model"]:
+            try:
+                app_label, model = options["model"].lower().split(".")
+                content_type = ContentType.objects.get(app_label=app_label, model=model)
+            except (ValueError, ContentType.DoesNotExist):
+                raise CommandError(f"Unknown model {options['model']}")
+
+        expected = expected_counters(content_type)
+        counters = EngagementCounter.objects.all()
+        if content_type is not None:
+            counters = counters.filter(content_type=content_type)
+
+        drifted, missing = [], []
+        drift = dict.fromkeys(COUNTER_FIELDS, 0)
+        for counter in counters.iterator(chunk_size=options["batch_size"]):
+            values = expected.pop((counter.content_type_id, counter.object_id), None) or dict.fromkeys(COUNTER_FIELDS, 0)
+            changed = False
+            for field, value in values.items():
+                if getattr(counter, field) != value:
+                    drift[field] += abs(getattr(counter, field) - value)
+                    setattr(counter, field, value)
+                    changed = True
+            if changed:
+                drifted.append(counter)
+
+        for (content_type_id, object_id), values in expected.items():
+            missing.append(EngagementCounter(content_type_id=content_type_id, object_id=object_id, **values))
+            for field, value in values.items():
+                drift[field] += value
+
+        self.stdout.write(
+            f"{len(drifted)} counters drifted, {len(missing)} missing; total drift: "
+            + ", ".join(f"{field} {value}" for field, value in drift.items())
+        )
+        if options["dry_run"]:
+            return
+
+        with transaction.atomic():
+            for batch in chunked(drifted, options["batch_size"]):
+                EngagementCounter.objects.bulk_update(batch, COUNTER_FIELDS)
+            EngagementCounter.objects.bulk_create(missing, batch_size=options["batch_size"], ignore_conflicts=True)
+            recompute_rating_scores(content_type.id if content_type else None)
+        self.stdout.write(
+            self.style.SUCCESS(f"counters successfully reconciled in {time.perf_counter() - started:.1f}s")
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.ads.models import AdsStatus, Report, ads_models
+from apps.ads.moderation import enqueue_ads, enqueue_reports
+from apps.common.utils import chunked
+
+
+class Command(BaseCommand):
+    help = "Enqueue ads waiting for moderation and reports filed before the moderation queue existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        # the unique constraints on ModerationItem make already queued ads and reports no-ops
+        for model in ads_models():
+            pks = model.objects.filter(status=AdsStatus.MODERATION).values_list("pk", flat=True)
+            total = 0
+            for batch in chunked(pks.iterator(chunk_size=batch_size), batch_size):
+                enqueue_ads(model, batch)
+                total += len(batch)
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {total} in moderation")
+
+        reports = Report.objects.filter(moderation_items__isnull=True).only("id", "content_type_id", "object_id")
+        total = 0
+        for batch in chunked(reports.iterator(chunk_size=batch_size), batch_size):
+            enqueue_reports(batch)
+            total += len(batch)
+        self.stdout.write(f"reports: {total} without a moderation item")
+        self.stdout.write(self.style.SUCCESS("moderation queue synced"))
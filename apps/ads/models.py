@@ -1,8 +1,14 @@
+from decimal import Decimal
+
+from django.apps import apps
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
+from apps.common.geo import geohash_encode
 from apps.common.models import BaseModel, Project
 
 
@@ -26,6 +32,35 @@ class PaymentStatus(models.IntegerChoices):
     PAID = 1, 'Paid'
 
 
+BASE_CURRENCY = Currency.UZS
+EXCHANGE_RATES_CACHE_KEY = "ads:exchange_rates"
+
+
+class ExchangeRate(models.Model):
+    currency = models.IntegerField(choices=Currency.choices, unique=True)
+    rate = models.DecimalField(max_digits=18, decimal_places=6, help_text="Price of one unit in the base currency (UZS)")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_currency_display()}: {self.rate}"
+
+    @classmethod
+    def rates(cls):
+        """``{currency: rate}`` for every known currency, cached until the rates are updated."""
+        rates = cache.get(EXCHANGE_RATES_CACHE_KEY)
+        if rates is None:
+            rates = {BASE_CURRENCY: Decimal(1), **dict(cls.objects.values_list("currency", "rate"))}
+            cache.set(EXCHANGE_RATES_CACHE_KEY, rates, 60 * 60)
+        return rates
+
+    @classmethod
+    def to_base(cls, amount, currency):
+        rate = cls.rates().get(currency)
+        if amount is None or rate is None:
+            return None
+        return (Decimal(amount) * rate).quantize(Decimal("0.01"))
+
+
 class Ads(BaseModel):
     user = models.ForeignKey('user.User', on_delete=models.CASCADE, related_name="ads")
 
@@ -33,6 +68,8 @@ class Ads(BaseModel):
     slug = models.SlugField(max_length=500, db_index=True)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=12, decimal_places=2)
+    # price converted to BASE_CURRENCY, kept in sync on save and by recompute_prices when a rate changes
+    price_base = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True, editable=False)
 
     currency = models.IntegerField(choices=Currency.choices, default=Currency.UZS)
     status = models.IntegerField(choices=AdsStatus.choices, default=AdsStatus.CREATED)
@@ -46,6 +83,8 @@ class Ads(BaseModel):
 
     latitude = models.FloatField(null=True)
     longitude = models.FloatField(null=True)
+    # derived from latitude/longitude on save, prefix lookups on it serve proximity and map viewport queries
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True, editable=False)
 
     is_vip = models.BooleanField(default=False)
     is_top = models.BooleanField(default=False)
@@ -58,15 +97,48 @@ class Ads(BaseModel):
         indexes = [
             models.Index(fields=["price"]),
             models.Index(fields=["region", "district"]),
+            # due promotions and lifetimes are found by range scans over these (see apps.ads.expiry)
+            models.Index(
+                fields=["vip_expiry_date"], condition=models.Q(is_vip=True), name="%(class)s_vip_expiry_idx"
+            ),
+            models.Index(
+                fields=["top_expiry_date"], condition=models.Q(is_top=True), name="%(class)s_top_expiry_idx"
+            ),
+            models.Index(
+                fields=["expiry_date"], condition=models.Q(status=AdsStatus.ACTIVE), name="%(class)s_expiry_idx"
+            ),
         ]
 
+    def save(self, *args, **kwargs):
+        self.price_base = ExchangeRate.to_base(self.price, self.currency)
+        self.geohash = self.compute_geohash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if {"price", "currency"} & update_fields:
+                update_fields.add("price_base")
+            if {"latitude", "longitude"} & update_fields:
+                update_fields.add("geohash")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return geohash_encode(self.latitude, self.longitude)
+
+
+def ads_models():
+    return [model for model in apps.get_models() if issubclass(model, Ads)]
+
 
 class GenericBaseModel(BaseModel):
     project = models.IntegerField(choices=Project.choices, null=True)
     user = models.ForeignKey("user.User", on_delete=models.CASCADE)
 
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, db_index=True)
-    object_id = models.PositiveBigIntegerField(db_index=True)
+    # every target (Estate, User) has a UUID primary key
+    object_id = models.UUIDField(db_index=True)
     content_object = GenericForeignKey("content_type", "object_id")
 
     class Meta:
@@ -81,16 +153,84 @@ class Image(GenericBaseModel):
     image = models.ForeignKey("common.Media", on_delete=models.CASCADE)
     is_main = models.BooleanField(default=False)
 
+    class Meta(GenericBaseModel.Meta):
+        ordering = ['-created_at']
+        constraints = [
+            # at most one main image per object; the partial unique index is also what main_image_prefetch scans
+            models.UniqueConstraint(
+                fields=["content_type", "object_id"],
+                condition=models.Q(is_main=True, is_deleted=False),
+                name="unique_main_image",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.is_main:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # the previous main image steps down in the same transaction instead of tripping the constraint
+            Image.objects.filter(
+                content_type_id=self.content_type_id, object_id=self.object_id, is_main=True
+            ).exclude(pk=self.pk).update(is_main=False, updated_at=timezone.now())
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Image on {self.content_type.model} for (ID {self.object_id})"
 
 
+def main_image_prefetch(lookup="images", to_attr="main_images"):
+    """
+    ``Prefetch`` of just the main image of each object with its ``Media`` joined in, so a
+    page of cards costs one image query (plus one for the media derivatives) in total.
+    """
+    queryset = Image.objects.filter(is_main=True).select_related("image").prefetch_related("image__derivatives")
+    return models.Prefetch(lookup, queryset=queryset, to_attr=to_attr)
+
+
+COMMENT_SEGMENT_LENGTH = 22  # 14 hex digits of microseconds since the epoch + 8 hex digits of the id
+COMMENT_MAX_DEPTH = 64
+
+
+def comment_path_segment(moment, pk):
+    return f"{int(moment.timestamp() * 1_000_000):014x}{pk.hex[:8]}"
+
+
 class Comment(GenericBaseModel):
     parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.CASCADE, related_name="replies")
     comment = models.TextField()
 
-    class Meta:
+    # materialized path: top-level comment of the thread, the segments of all ancestors plus the own one,
+    # so sorting a thread by path yields it depth-first in chronological order
+    root = models.ForeignKey("self", null=True, blank=True, on_delete=models.CASCADE, related_name="thread")
+    path = models.CharField(max_length=COMMENT_SEGMENT_LENGTH * COMMENT_MAX_DEPTH, default="", editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta(GenericBaseModel.Meta):
         ordering = ['-created_at']
+        indexes = GenericBaseModel.Meta.indexes + [
+            models.Index(fields=["root", "path"]),
+            models.Index(
+                fields=["content_type", "object_id", "-created_at", "-id"],
+                condition=models.Q(depth=0, is_deleted=False),
+                name="comment_top_level_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.path:
+            self.set_path()
+        super().save(*args, **kwargs)
+
+    def set_path(self, now=None):
+        # replies below the maximum depth are attached to the deepest allowed ancestor
+        while self.parent is not None and self.parent.depth >= COMMENT_MAX_DEPTH - 1:
+            self.parent = self.parent.parent
+        segment = comment_path_segment(now or timezone.now(), self.id)
+        if self.parent is None:
+            self.root_id, self.path, self.depth = self.id, segment, 0
+        else:
+            self.root_id = self.parent.root_id or self.parent.id
+            self.path, self.depth = self.parent.path + segment, self.parent.depth + 1
 
     def __str__(self):
         return f"Commented by {self.user} on {self.content_type.model} (ID {self.object_id})"
@@ -179,3 +319,118 @@ class Rating(GenericBaseModel):
 
     def __str__(self):
         return f"Rating by {self.user} on {self.content_type.model} (ID {self.object_id})"
+
+
+class EngagementCounter(models.Model):
+    """
+    Denormalized like/view/bookmark/comment/report counts and rating aggregates of one object.
+
+    Kept up to date with ``F()`` increments by the signals in ``apps.ads.signals``;
+    ``reconcile_counters`` recomputes them from the engagement tables.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.UUIDField()
+    content_object = GenericForeignKey("content_type", "object_id")
+
+    likes = models.IntegerField(default=0)
+    views = models.IntegerField(default=0)
+    bookmarks = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    reports = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+    # Bayesian average: the ratings plus RATING_PRIOR_WEIGHT votes at the mean of all objects of the same type
+    rating_score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["content_type", "object_id"], name="unique_counter_per_object")
+        ]
+        indexes = [
+            models.Index(fields=["content_type", "-rating_score"], name="counter_rating_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"Counters of {self.content_type.model} (ID {self.object_id})"
+
+    @property
+    def rating_average(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else None
+
+    @property
+    def rating_histogram(self):
+        return [self.rating_1, self.rating_2, self.rating_3, self.rating_4, self.rating_5]
+
+
+class ModerationKind(models.IntegerChoices):
+    AD = 1, 'Ad Review'
+    REPORT = 2, 'Report'
+
+
+class ModerationStatus(models.IntegerChoices):
+    PENDING = 0, 'Pending'
+    APPROVED = 1, 'Approved'
+    REJECTED = 2, 'Rejected'
+
+
+class ModerationItem(models.Model):
+    """
+    One unit of moderation work: an ad waiting for review or a report against an ad.
+
+    Moderators claim items for ``MODERATION_LEASE_SECONDS`` (see ``apps.ads.moderation``);
+    an item whose lease ran out without a decision is back in the queue.
+    """
+
+    kind = models.IntegerField(choices=ModerationKind.choices)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.UUIDField()
+    content_object = GenericForeignKey("content_type", "object_id")
+    report = models.ForeignKey(
+        Report, on_delete=models.CASCADE, null=True, blank=True, related_name="moderation_items"
+    )
+
+    status = models.IntegerField(choices=ModerationStatus.choices, default=ModerationStatus.PENDING)
+    claimed_by = models.ForeignKey(
+        'user.User', on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    resolved_by = models.ForeignKey(
+        'user.User', on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    note = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # an ad is in the queue at most once at a time, a report at most once ever
+            models.UniqueConstraint(
+                fields=["content_type", "object_id"],
+                condition=models.Q(kind=ModerationKind.AD, status=ModerationStatus.PENDING),
+                name="unique_pending_ad_review",
+            ),
+            models.UniqueConstraint(fields=["report"], name="unique_report_moderation"),
+        ]
+        indexes = [
+            # the queue itself: claims scan pending items oldest first
+            models.Index(
+                fields=["created_at"], condition=models.Q(status=ModerationStatus.PENDING), name="moderation_pending_idx"
+            ),
+            models.Index(
+                fields=["claimed_by", "lease_expires_at"],
+                condition=models.Q(status=ModerationStatus.PENDING),
+                name="moderation_leased_idx",
+            ),
+            models.Index(fields=["content_type", "object_id"]),
+            models.Index(fields=["resolved_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} of {self.content_type.model} (ID {self.object_id})"
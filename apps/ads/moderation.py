@@ -0,0 +1,168 @@
+"""
+Moderation queue shared by many moderators.
+
+``claim`` hands out the oldest pending items with ``SELECT ... FOR UPDATE SKIP LOCKED``:
+concurrent claims skip each other's rows instead of waiting or returning the same ones,
+and each claimed item is leased to the moderator until ``lease_expires_at``. Decisions
+are applied with set-based UPDATEs, only to items the moderator still holds a lease on.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.dispatch import Signal
+
+from apps.ads.generic import content_type_for_id
+from apps.ads.models import Ads, AdsStatus, ModerationItem, ModerationKind, ModerationStatus
+from apps.common.utils import tashkent_now
+
+# sent with ``pks`` of the ads whose status a decision changed, the UPDATEs bypass post_save
+moderated = Signal()
+
+# (kind, approved) -> (statuses an ad may be in, status it gets)
+DECISIONS = {
+    (ModerationKind.AD, True): ((AdsStatus.MODERATION,), AdsStatus.ACTIVE),
+    (ModerationKind.AD, False): ((AdsStatus.MODERATION,), AdsStatus.MODERATOR_DEACTIVE),
+    # an upheld report takes the ad down, a dismissed one leaves it alone
+    (ModerationKind.REPORT, True): ((AdsStatus.MODERATION, AdsStatus.ACTIVE), AdsStatus.MODERATOR_DEACTIVE),
+}
+
+
+def pending():
+    return ModerationItem.objects.filter(status=ModerationStatus.PENDING)
+
+
+def enqueue_ads(model, pks):
+    content_type = ContentType.objects.get_for_model(model)
+    # unique_pending_ad_review makes re-enqueueing an ad that is already waiting a no-op
+    ModerationItem.objects.bulk_create(
+        [ModerationItem(kind=ModerationKind.AD, content_type=content_type, object_id=pk) for pk in pks],
+        ignore_conflicts=True,
+    )
+
+
+def enqueue_reports(reports):
+    ModerationItem.objects.bulk_create(
+        [
+            ModerationItem(
+                kind=ModerationKind.REPORT,
+                content_type_id=report.content_type_id,
+                object_id=report.object_id,
+                report=report,
+            )
+            for report in reports
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def leased(moderator, now):
+    return pending().filter(claimed_by=moderator, lease_expires_at__gt=now)
+
+
+def claim(moderator, count=10, kind=None):
+    """
+    The moderator's leased items topped up to ``count`` with the oldest unclaimed ones, every
+    lease extended by ``MODERATION_LEASE_SECONDS``; returns the items, oldest first.
+    """
+    now = tashkent_now()
+    lease = now + timedelta(seconds=settings.MODERATION_LEASE_SECONDS)
+    with transaction.atomic():
+        held = list(leased(moderator, now).values_list("pk", flat=True)[:count])
+        available = pending().filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now))
+        if kind is not None:
+            available = available.filter(kind=kind)
+        fresh = list(
+            available.order_by("created_at")
+            .select_for_update(skip_locked=True)
+            .values_list("pk", flat=True)[:max(count - len(held), 0)]
+        )
+        pks = held + fresh
+        ModerationItem.objects.filter(pk__in=pks).update(claimed_by=moderator, lease_expires_at=lease)
+    return ModerationItem.objects.filter(pk__in=pks).select_related("report").order_by("created_at")
+
+
+def release(moderator, pks):
+    """Hand leased items back to the queue without a decision."""
+    return leased(moderator, tashkent_now()).filter(pk__in=pks).update(claimed_by=None, lease_expires_at=None)
+
+
+def resolve(moderator, pks, approve, note=""):
+    """
+    Approve or reject the given items the moderator holds a lease on, and apply the decision
+    to the ads set-wise; items leased to others, expired or already decided are skipped.
+    """
+    now = tashkent_now()
+    status = ModerationStatus.APPROVED if approve else ModerationStatus.REJECTED
+    with transaction.atomic():
+        items = list(
+            leased(moderator, now).filter(pk__in=pks).select_for_update().values_list(
+                "pk", "kind", "content_type_id", "object_id"
+            )
+        )
+        resolved = [pk for pk, _, _, _ in items]
+        ModerationItem.objects.filter(pk__in=resolved).update(
+            status=status, resolved_by=moderator, resolved_at=now, note=note, lease_expires_at=None
+        )
+
+        targets = defaultdict(set)  # (content type id, kind) -> ad pks
+        for _, kind, content_type_id, object_id in items:
+            targets[content_type_id, kind].add(object_id)
+
+        updated = 0
+        for (content_type_id, kind), object_ids in targets.items():
+            model = content_type_for_id(content_type_id).model_class()
+            if (kind, approve) not in DECISIONS or model is None or not issubclass(model, Ads):
+                continue
+            from_statuses, new_status = DECISIONS[kind, approve]
+            changed = list(
+                model.all_objects.filter(pk__in=object_ids, status__in=from_statuses)
+                .select_for_update()
+                .values_list("pk", flat=True)
+            )
+            updated += model.all_objects.filter(pk__in=changed).update(status=new_status, updated_at=now)
+            if changed:
+                moderated.send(sender=model, pks=changed, status=new_status)
+
+            if kind == ModerationKind.REPORT:
+                # the ad is down, the other reports against it need no separate decision
+                pending().filter(
+                    kind=ModerationKind.REPORT, content_type_id=content_type_id, object_id__in=object_ids
+                ).update(
+                    status=status, resolved_by=moderator, resolved_at=now, note=note,
+                    claimed_by=None, lease_expires_at=None,
+                )
+
+    return {"resolved": len(resolved), "skipped": len(set(pks)) - len(resolved), "ads_updated": updated}
+
+
+def metrics():
+    """Queue depth, claimed share and age of the oldest pending item per kind, plus the last hour's throughput."""
+    now = tashkent_now()
+    rows = pending().values("kind").annotate(
+        depth=Count("id"),
+        claimed=Count("id", filter=Q(lease_expires_at__gt=now)),
+        oldest=Min("created_at"),
+    ).order_by()
+    queues = {
+        ModerationKind(row["kind"]).name.lower(): {
+            "depth": row["depth"],
+            "claimed": row["claimed"],
+            "oldest_age_seconds": round((now - row["oldest"]).total_seconds()),
+        }
+        for row in rows
+    }
+    for kind in ModerationKind:
+        queues.setdefault(kind.name.lower(), {"depth": 0, "claimed": 0, "oldest_age_seconds": None})
+
+    resolved = ModerationItem.objects.filter(resolved_at__gte=now - timedelta(hours=1)).aggregate(
+        total=Count("id"), moderators=Count("resolved_by", distinct=True)
+    )
+    return {
+        "queues": queues,
+        "resolved_last_hour": resolved["total"],
+        "active_moderators_last_hour": resolved["moderators"],
+    }
@@ -0,0 +1,130 @@
+from rest_framework import serializers
+
+from apps.ads.counters import empty_rating_summary, rating_summaries
+from apps.ads.engagement import empty_state, engagement_states
+from apps.ads.models import Comment, ModerationItem, ModerationKind, Report
+from apps.common.serializers import MediaSerializer
+from apps.user.serializers import UserMiniSerializer
+
+ENGAGEMENT_CONTEXT_KEY = "engagement_states"
+RATING_CONTEXT_KEY = "rating_summaries"
+
+
+def page_objects(serializer, obj):
+    """Objects rendered together with ``obj``: the parent ListSerializer's instances, or just ``obj``."""
+    parent = serializer.parent
+    return list(parent.instance) if parent is not None and parent.instance is not None else [obj]
+
+
+class EngagementStateMixin(serializers.Serializer):
+    """
+    Adds ``engagement`` (liked/bookmarked/reported/rating of the request user) to each object.
+
+    The states of a whole list (the page the parent ListSerializer renders) are resolved
+    on the first item with one query, instead of four queries per item.
+    """
+
+    engagement = serializers.SerializerMethodField()
+
+    def get_engagement(self, obj):
+        states = self.context.get(ENGAGEMENT_CONTEXT_KEY)
+        if states is None or obj.pk not in states:
+            request = self.context.get("request")
+            states = engagement_states(getattr(request, "user", None), page_objects(self, obj))
+            self.context[ENGAGEMENT_CONTEXT_KEY] = states
+        return states.get(obj.pk) or empty_state()
+
+
+class RatingSummaryMixin(serializers.Serializer):
+    """Adds ``rating`` (count, average, Bayesian score, 1-5 histogram) from the counters, one query per page."""
+
+    rating = serializers.SerializerMethodField()
+
+    def get_rating(self, obj):
+        summaries = self.context.get(RATING_CONTEXT_KEY)
+        if summaries is None or obj.pk not in summaries:
+            objects = page_objects(self, obj)
+            summaries = {pk: empty_rating_summary() for pk in (item.pk for item in objects)}
+            summaries.update(rating_summaries(objects))
+            self.context[RATING_CONTEXT_KEY] = summaries
+        return summaries.get(obj.pk) or empty_rating_summary()
+
+
+class MainImageMixin(serializers.Serializer):
+    """
+    Adds ``main_image`` (the media of the ``is_main`` image). Querysets should use
+    ``main_image_prefetch()``, otherwise each object costs a query of its own.
+    """
+
+    main_image = serializers.SerializerMethodField()
+
+    def get_main_image(self, obj):
+        images = getattr(obj, "main_images", None)
+        if images is None:
+            images = obj.images.filter(is_main=True).select_related("image")[:1]
+        return MediaSerializer(images[0].image, context=self.context).data if images else None
+
+
+class CommentSerializer(serializers.ModelSerializer):
+    user = UserMiniSerializer(read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ("id", "user", "parent", "root", "depth", "comment", "created_at")
+
+
+class CommentThreadSerializer(CommentSerializer):
+    replies = CommentSerializer(source="preview", many=True, read_only=True)
+    reply_count = serializers.IntegerField(read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ("replies", "reply_count")
+
+
+class CommentCreateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Comment
+        fields = ("id", "parent", "comment")
+
+    def validate_parent(self, parent):
+        content_type, object_id = self.context["content_type"], self.context["object_id"]
+        if parent is not None and (parent.content_type_id != content_type.id or parent.object_id != object_id):
+            raise serializers.ValidationError("Parent comment belongs to another object.")
+        return parent
+
+
+class ModerationReportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Report
+        fields = ("id", "user", "reason", "description", "created_at")
+
+
+class ModerationItemSerializer(serializers.ModelSerializer):
+    content_type = serializers.CharField(source="content_type.model", read_only=True)
+    target = serializers.SerializerMethodField()
+    report = ModerationReportSerializer(read_only=True)
+
+    class Meta:
+        model = ModerationItem
+        fields = ("id", "kind", "content_type", "object_id", "target", "report", "created_at", "lease_expires_at")
+
+    def get_target(self, obj):
+        # content objects are resolved for the whole batch by the view (prefetch_content_objects)
+        target = obj.content_object
+        if target is None:
+            return None
+        return {"id": target.pk, "title": getattr(target, "title", str(target)), "status": getattr(target, "status", None)}
+
+
+class ModerationClaimSerializer(serializers.Serializer):
+    count = serializers.IntegerField(min_value=1, max_value=50, default=10)
+    kind = serializers.ChoiceField(choices=ModerationKind.choices, required=False)
+
+
+class ModerationReleaseSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=500)
+
+
+class ModerationResolveSerializer(ModerationReleaseSerializer):
+    action = serializers.ChoiceField(choices=("approve", "reject"))
+    note = serializers.CharField(required=False, allow_blank=True, default="")
@@ -0,0 +1,76 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.ads.counters import COUNTED_MODELS, bump, bump_rows
+from apps.ads.models import AdsStatus, Rating, Report, ads_models
+from apps.ads.moderation import enqueue_ads, enqueue_reports
+from apps.common.managers import restored, soft_deleted
+
+ENGAGEMENT_MODELS = (*COUNTED_MODELS, Rating)
+
+
+def engagement_rows(model, pks):
+    fields = ("content_type_id", "object_id", "rating") if model is Rating else ("content_type_id", "object_id")
+    rows = model.all_objects.filter(pk__in=pks).values_list(*fields)
+    return rows if model is Rating else [(*row, None) for row in rows]
+
+
+@receiver(post_init, sender=Rating)
+def remember_rating(sender, instance, **kwargs):
+    instance._counted_rating = instance.__dict__.get("rating")
+
+
+def engagement_saved(sender, instance, created, **kwargs):
+    if instance.is_deleted:
+        return
+    if sender is Rating:
+        previous = instance._counted_rating
+        if created:
+            bump_rows(sender, [(instance.content_type_id, instance.object_id, instance.rating)], 1)
+        elif previous is not None and previous != instance.rating:
+            bump(
+                instance.content_type_id,
+                instance.object_id,
+                rating_sum=instance.rating - previous,
+                **{f"rating_{previous}": -1, f"rating_{instance.rating}": 1},
+            )
+        instance._counted_rating = instance.rating
+    elif created:
+        bump(instance.content_type_id, instance.object_id, **{COUNTED_MODELS[sender]: 1})
+
+
+def engagement_deleted(sender, instance, **kwargs):
+    # hard delete of a soft-deleted row was already subtracted by engagement_soft_deleted
+    if not instance.is_deleted:
+        bump_rows(sender, [(instance.content_type_id, instance.object_id, getattr(instance, "rating", None))], -1)
+
+
+def engagement_soft_deleted(sender, pks, **kwargs):
+    bump_rows(sender, engagement_rows(sender, pks), -1)
+
+
+def engagement_restored(sender, pks, **kwargs):
+    bump_rows(sender, engagement_rows(sender, pks), 1)
+
+
+for model in ENGAGEMENT_MODELS:
+    post_save.connect(engagement_saved, sender=model)
+    post_delete.connect(engagement_deleted, sender=model)
+    soft_deleted.connect(engagement_soft_deleted, sender=model)
+    restored.connect(engagement_restored, sender=model)
+
+
+def ad_saved(sender, instance, **kwargs):
+    # saving an ad that already waits for review is a no-op insert, so no state snapshot is needed
+    if instance.status == AdsStatus.MODERATION and not instance.is_deleted:
+        enqueue_ads(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Report)
+def report_saved(sender, instance, created, **kwargs):
+    if created:
+        enqueue_reports([instance])
+
+
+for model in ads_models():
+    post_save.connect(ad_saved, sender=model)
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+import requests
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from apps.ads import expiry, tracking
+from apps.ads.counters import recompute_rating_scores
+from apps.ads.models import BASE_CURRENCY, Currency, EXCHANGE_RATES_CACHE_KEY, ExchangeRate, ads_models
+from apps.common.utils import chunked
+
+
+def fetch_exchange_rates():
+    """``{currency: rate}`` from the Central Bank of Uzbekistan, rates are in UZS per one unit."""
+    response = requests.get(settings.EXCHANGE_RATES_URL, timeout=10)
+    response.raise_for_status()
+    quotes = {
+        item["Ccy"]: Decimal(item["Rate"]) / Decimal(item.get("Nominal") or 1)
+        for item in response.json()
+    }
+    return {
+        currency: quotes[currency.label].quantize(Decimal("0.000001"))
+        for currency in Currency
+        if currency != BASE_CURRENCY and currency.label in quotes
+    }
+
+
+@shared_task
+def update_exchange_rates():
+    changed = []
+    for currency, rate in fetch_exchange_rates().items():
+        exchange_rate, created = ExchangeRate.objects.get_or_create(currency=currency, defaults={"rate": rate})
+        if created or exchange_rate.rate != rate:
+            exchange_rate.rate = rate
+            exchange_rate.save(update_fields=["rate", "updated_at"])
+            changed.append(int(currency))
+
+    if changed:
+        cache.delete(EXCHANGE_RATES_CACHE_KEY)
+        for currency in changed:
+            recompute_prices.delay(currency)
+    return changed
+
+
+@shared_task
+def recompute_prices(currency, batch_size=5000):
+    """Rewrite ``price_base`` of every ad priced in ``currency`` with one set-based UPDATE per batch."""
+    rate = ExchangeRate.rates().get(currency)
+    if rate is None:
+        return 0
+
+    updated = 0
+    for model in ads_models():
+        manager = model.all_objects
+        pks = manager.filter(currency=currency).order_by("pk").values_list("pk", flat=True)
+        for batch in chunked(pks.iterator(chunk_size=batch_size), batch_size):
+            updated += manager.filter(pk__in=batch).update(price_base=F("price") * rate)
+    return updated
+
+
+@shared_task
+def flush_views():
+    return tracking.flush_views()
+
+
+@shared_task
+def refresh_rating_scores():
+    return recompute_rating_scores()
+
+
+@shared_task
+def expire_ads():
+    return expiry.expire()
@@ -0,0 +1,122 @@
+"""
+Write-behind view tracking.
+
+A page view costs one pipelined Redis round trip: the viewer goes into a HyperLogLog
+of the object (unique views, anonymous included, expiring ``VIEW_UNIQUE_TTL`` after
+the last view) and, for signed-in users, into a pending hash deduplicated by
+``content_type:object:user``. ``flush_views`` moves the pending hash into the ``View``
+table in batches and recounts the view counters.
+"""
+import ipaddress
+import logging
+import uuid
+from collections import defaultdict
+
+import redis
+from django.conf import settings
+
+from apps.ads.counters import recount
+from apps.ads.models import View
+from apps.common.utils import chunked
+from apps.user.models import User
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "views:pending"
+FLUSHING_KEY = "views:flushing"
+FLUSH_LOCK_KEY = "views:flush-lock"
+UNIQUE_KEY = "views:unique:{content_type_id}:{object_id}"
+
+redis_client = redis.StrictRedis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
+)
+
+
+def valid_ip(ip_address):
+    """``ip_address`` if it parses as an IPv4/IPv6 address, else ``None``; X-Forwarded-For is client supplied."""
+    try:
+        return str(ipaddress.ip_address(ip_address))
+    except (TypeError, ValueError):
+        return None
+
+
+def record_view(content_type_id, object_id, user_id=None, ip_address=None):
+    ip_address = valid_ip(ip_address)
+    visitor = f"user:{user_id}" if user_id else f"ip:{ip_address}" if ip_address else None
+    if visitor is None:
+        return
+    unique_key = UNIQUE_KEY.format(content_type_id=content_type_id, object_id=object_id)
+    pipeline = redis_client.pipeline(transaction=False)
+    pipeline.pfadd(unique_key, visitor)
+    pipeline.expire(unique_key, settings.VIEW_UNIQUE_TTL)
+    if user_id:
+        # the first view of a user wins, like the unique constraint on View
+        pipeline.hsetnx(PENDING_KEY, f"{content_type_id}:{object_id}:{user_id}", ip_address or "")
+    try:
+        pipeline.execute()
+    except redis.RedisError:
+        # losing a view is better than failing the page
+        pass
+
+
+def unique_views(content_type_id, object_id):
+    """Approximate number of distinct visitors (users or IPs), ``None`` when Redis is unavailable."""
+    try:
+        return redis_client.pfcount(UNIQUE_KEY.format(content_type_id=content_type_id, object_id=object_id))
+    except redis.RedisError:
+        return None
+
+
+def flush_views(batch_size=5000):
+    """Persist pending views; safe to rerun after a crash since inserts ignore duplicates and counts are recomputed."""
+    lock = redis_client.lock(FLUSH_LOCK_KEY, timeout=10 * 60)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        # a leftover FLUSHING_KEY means the previous flush died half-way, finish it first
+        if not redis_client.exists(FLUSHING_KEY):
+            try:
+                redis_client.rename(PENDING_KEY, FLUSHING_KEY)
+            except redis.ResponseError:
+                return 0  # nothing pending
+
+        flushed = 0
+        for batch in chunked(redis_client.hscan_iter(FLUSHING_KEY, count=batch_size), batch_size):
+            flushed += store_views(batch)
+        redis_client.delete(FLUSHING_KEY)
+        return flushed
+    finally:
+        lock.release()
+
+
+def store_views(items):
+    views = []
+    for key, ip_address in items:
+        # a malformed entry must not poison the batch, the flush would retry it forever
+        try:
+            content_type_id, object_id, user_id = key.decode().split(":")
+            view = (int(content_type_id), uuid.UUID(object_id), str(uuid.UUID(user_id)), valid_ip(ip_address.decode()))
+        except ValueError:
+            logger.warning("Dropping malformed pending view %r", key)
+            continue
+        views.append(view)
+
+    # views of users deleted in the meantime would violate the foreign key
+    users = {str(pk) for pk in User.objects.filter(pk__in={view[2] for view in views}).values_list("pk", flat=True)}
+    View.objects.bulk_create(
+        [
+            View(content_type_id=content_type_id, object_id=object_id, user_id=user_id, ip_address=ip_address)
+            for content_type_id, object_id, user_id, ip_address in views
+            if user_id in users
+        ],
+        ignore_conflicts=True,
+    )
+
+    touched = defaultdict(set)
+    for content_type_id, object_id, _, _ in views:
+        touched[content_type_id].add(object_id)
+    for content_type_id, object_ids in touched.items():
+        recount(View, content_type_id, object_ids)
+    return len(views)
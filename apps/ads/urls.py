@@ -0,0 +1,12 @@
+from django.urls import path
+
+from apps.ads import views
+
+app_name = "ads"
+
+urlpatterns = [
+    path("moderation/claim/", views.ModerationClaimView.as_view(), name="moderation-claim"),
+    path("moderation/resolve/", views.ModerationResolveView.as_view(), name="moderation-resolve"),
+    path("moderation/release/", views.ModerationReleaseView.as_view(), name="moderation-release"),
+    path("moderation/metrics/", views.ModerationMetricsView.as_view(), name="moderation-metrics"),
+]
@@ -1,3 +1,61 @@
-from django.shortcuts import render
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from apps.ads import moderation
+from apps.ads.generic import prefetch_content_objects
+from apps.ads.serializers import (
+    ModerationClaimSerializer,
+    ModerationItemSerializer,
+    ModerationReleaseSerializer,
+    ModerationResolveSerializer,
+)
+from apps.user.permissions import IsModerator
+
+
+class ModerationClaimView(APIView):
+    """
+    Lease the next batch of moderation items: the ones already leased to the moderator,
+    topped up with the oldest items nobody holds. Concurrent moderators never get the same item.
+    """
+
+    permission_classes = (IsModerator,)
+
+    @swagger_auto_schema(request_body=ModerationClaimSerializer, responses={200: ModerationItemSerializer(many=True)})
+    def post(self, request):
+        params = ModerationClaimSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        items = prefetch_content_objects(moderation.claim(request.user, **params.validated_data))
+        return Response(ModerationItemSerializer(items, many=True).data)
+
+
+class ModerationResolveView(APIView):
+    """Approve or reject leased items in bulk; ``skipped`` counts items no longer leased to the moderator."""
+
+    permission_classes = (IsModerator,)
+
+    @swagger_auto_schema(request_body=ModerationResolveSerializer)
+    def post(self, request):
+        params = ModerationResolveSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        result = moderation.resolve(request.user, data["ids"], data["action"] == "approve", data["note"])
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class ModerationReleaseView(APIView):
+    permission_classes = (IsModerator,)
+
+    @swagger_auto_schema(request_body=ModerationReleaseSerializer)
+    def post(self, request):
+        params = ModerationReleaseSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        return Response({"released": moderation.release(request.user, params.validated_data["ids"])})
+
+
+class ModerationMetricsView(APIView):
+    permission_classes = (IsModerator,)
+
+    def get(self, request):
+        return Response(moderation.metrics(), status=status.HTTP_200_OK)
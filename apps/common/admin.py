@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Country, Region, District, Neighborhood, Media
+from .models import Country, Region, District, Neighborhood, Media, MediaDerivative, UploadSession
 
 
 @admin.action(description="Restore selected objects")
@@ -61,9 +61,29 @@ class NeighborhoodAdmin(admin.ModelAdmin):
     autocomplete_fields = ("district",)
 
 
+class MediaDerivativeInline(admin.TabularInline):
+    model = MediaDerivative
+    extra = 0
+    can_delete = False
+    fields = ("size", "format", "file", "width", "height", "file_size", "created_at")
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Media)
 class MediaAdmin(admin.ModelAdmin):
-    list_display = ("file_name", "file_type")
-    search_fields = ("file_name",)
+    list_display = ("file_name", "file_type", "width", "height")
+    search_fields = ("file_name", "=sha256")
     list_filter = ("file_type",)
-    readonly_fields = ("file_type", "file_name")
+    readonly_fields = ("file_type", "file_name", "sha256", "width", "height")
+    inlines = (MediaDerivativeInline,)
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("file_name", "user", "offset", "file_size", "media", "updated_at")
+    search_fields = ("file_name", "user__username")
+    readonly_fields = ("offset", "media", "created_at", "updated_at")
+    raw_id_fields = ("user",)
@@ -0,0 +1,88 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache bounded both by entry count and by total size.
+
+    ``sizeof`` measures a key/value pair (characters for strings by default);
+    least recently used entries are evicted until both limits hold again.
+    """
+
+    def __init__(self, max_entries=10_000, max_size=1_000_000, sizeof=None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda key, value: len(key) + len(value))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, _ = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        size = self.sizeof(key, value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            if key in self._data:
+                self.size -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self.size += size
+            while len(self._data) > self.max_entries or self.size > self.max_size:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "size": self.size,
+            "max_entries": self.max_entries,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+GAZETTEER_VERSION_KEY = "gazetteer:version"
+
+
+def gazetteer_version():
+    """Current version of the country/region/district/neighborhood data, shared by all workers."""
+    version = cache.get(GAZETTEER_VERSION_KEY)
+    if version is None:
+        cache.add(GAZETTEER_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(GAZETTEER_VERSION_KEY)
+    return version
+
+
+def bump_gazetteer_version():
+    """Invalidate everything cached under the previous gazetteer version."""
+    cache.set(GAZETTEER_VERSION_KEY, uuid.uuid4().hex, None)
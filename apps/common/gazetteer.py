@@ -0,0 +1,173 @@
+import bisect
+import gzip
+import hashlib
+import json
+import re
+import threading
+
+import brotli
+from django.core.cache import cache
+
+from apps.common.cache import bump_gazetteer_version, gazetteer_version
+from apps.common.management.commands.translate import generate_cyrillic
+from apps.common.models import Country, Region, District, Neighborhood
+
+TREE_CACHE_KEY = "gazetteer:tree:{version}"
+TREE_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+
+TREE_LEVELS = (
+    ("countries", Country, None),
+    ("regions", Region, "country"),
+    ("districts", District, "region"),
+    ("neighborhoods", Neighborhood, "district"),
+)
+
+
+def invalidate_gazetteer():
+    """Bump the gazetteer version and rebuild derived data in the background."""
+    from apps.common.tasks import rebuild_gazetteer_tree
+
+    bump_gazetteer_version()
+    rebuild_gazetteer_tree.delay()
+
+
+def build_tree():
+    """Whole hierarchy in columnar form: parallel ``id`` / parent / ``name`` arrays per level."""
+    tree = {}
+    for level, model, parent in TREE_LEVELS:
+        fields = ("id", f"{parent}_id", "name") if parent else ("id", "name")
+        rows = list(model.objects.order_by("id").values_list(*fields))
+        columns = list(zip(*rows)) or [()] * len(fields)
+        tree[level] = {
+            name.removesuffix("_id"): list(column) for name, column in zip(fields, columns)
+        }
+    return tree
+
+
+def build_tree_snapshot(version=None):
+    """Render, compress and cache the tree for ``version`` (the current one by default)."""
+    version = version or gazetteer_version()
+    body = json.dumps(
+        {"version": version, **build_tree()}, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+    snapshot = {
+        "version": version,
+        "etag": f'"{hashlib.sha1(body).hexdigest()}"',
+        "identity": body,
+        "gzip": gzip.compress(body, compresslevel=9),
+        "br": brotli.compress(body, quality=11),
+    }
+    cache.set(TREE_CACHE_KEY.format(version=version), snapshot, TREE_CACHE_TIMEOUT)
+    return snapshot
+
+
+def get_tree_snapshot():
+    """Cached snapshot for the current version, built inline only if the background build has not run yet."""
+    version = gazetteer_version()
+    return cache.get(TREE_CACHE_KEY.format(version=version)) or build_tree_snapshot(version)
+
+
+_APOSTROPHES = re.compile("[ʻʼ’‘`']")
+# quotes (generate_cyrillic wraps whole names in «») and punctuation never take part in a match
+_PUNCTUATION = re.compile(r"[«»\"“”„(),.;:!?]")
+
+
+def normalize(text):
+    text = _PUNCTUATION.sub(" ", _APOSTROPHES.sub("'", text))
+    return " ".join(text.casefold().split())
+
+
+class GazetteerIndex:
+    """
+    In-memory autocomplete index over region, district and neighborhood names.
+
+    Every name is indexed in Latin and Cyrillic. Queries are answered from
+    sorted word-prefix arrays (one per level, so regions rank before districts
+    before neighborhoods), falling back to trigram postings for infix matches.
+    """
+
+    LEVELS = ("region", "district", "neighborhood")
+
+    def __init__(self, version):
+        self.version = version
+        self.entries = []
+        self.forms = []
+        self.prefixes = {level: [] for level in self.LEVELS}
+        self.trigrams = {}
+
+        regions = dict(Region.objects.values_list("id", "name"))
+        districts = {
+            pk: (name, region_id) for pk, name, region_id in District.objects.values_list("id", "name", "region_id")
+        }
+
+        for pk, name in regions.items():
+            self.add("region", pk, name, [])
+        for pk, (name, region_id) in districts.items():
+            self.add("district", pk, name, [regions.get(region_id)])
+        for pk, name, district_id in Neighborhood.objects.values_list("id", "name", "district_id"):
+            district_name, region_id = districts.get(district_id, (None, None))
+            self.add("neighborhood", pk, name, [district_name, regions.get(region_id)])
+
+        for keys in self.prefixes.values():
+            keys.sort()
+        self.trigrams = {gram: sorted(postings) for gram, postings in self.trigrams.items()}
+
+    def add(self, level, pk, name, parents):
+        index = len(self.entries)
+        self.entries.append({
+            "type": level,
+            "id": pk,
+            "name": name,
+            "path": ", ".join(parent for parent in parents if parent),
+        })
+        forms = {normalize(name), normalize(generate_cyrillic(name) or name)}
+        self.forms.append(forms)
+        for form in forms:
+            words = form.split()
+            for start in range(len(words)):
+                self.prefixes[level].append((" ".join(words[start:]), index))
+            for i in range(len(form) - 2):
+                self.trigrams.setdefault(form[i:i + 3], set()).add(index)
+
+    def search(self, query, limit=10, level=None):
+        query = normalize(query)
+        if not query:
+            return []
+        found = {}
+
+        for current in (level,) if level else self.LEVELS:
+            keys = self.prefixes[current]
+            position = bisect.bisect_left(keys, (query,))
+            while position < len(keys) and len(found) < limit and keys[position][0].startswith(query):
+                found.setdefault(keys[position][1], None)
+                position += 1
+            if len(found) >= limit:
+                break
+
+        if len(found) < limit and len(query) >= 3:
+            # postings are sorted by entry index, and entries were added level by level
+            rarest = min((self.trigrams.get(query[i:i + 3], ()) for i in range(len(query) - 2)), key=len)
+            for index in rarest:
+                if len(found) >= limit:
+                    break
+                if level and self.entries[index]["type"] != level:
+                    continue
+                if any(query in form for form in self.forms[index]):
+                    found.setdefault(index, None)
+
+        return [self.entries[index] for index in found]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Process-wide index, rebuilt lazily whenever the gazetteer version changes."""
+    global _index
+    version = gazetteer_version()
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = GazetteerIndex(version)
+    return _index
@@ -0,0 +1,111 @@
+import math
+from functools import reduce
+from operator import or_
+
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+GEOHASH_PRECISION = 12
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    result, value, bits, even = [], 0, 0, True
+    while len(result) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        if coordinate >= middle:
+            value = value * 2 + 1
+            interval[0] = middle
+        else:
+            value *= 2
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            result.append(GEOHASH_ALPHABET[value])
+            value = bits = 0
+    return "".join(result)
+
+
+def geohash_cell_size(precision):
+    """``(height, width)`` in degrees of a geohash cell of the given length."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** lon_bits
+
+
+def geohash_cover(min_lat, min_lon, max_lat, max_lon, max_cells=24):
+    """
+    Geohash prefixes whose cells together cover the bounding box.
+
+    The longest prefix length that needs at most ``max_cells`` cells is used, so each
+    prefix becomes one index range scan that reads few rows outside of the box.
+    """
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+
+    cells = [""]
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = geohash_cell_size(precision)
+        rows = range(math.floor((min_lat + 90) / height), math.floor((max_lat + 90) / height) + 1)
+        columns = range(math.floor((min_lon + 180) / width), math.floor((max_lon + 180) / width) + 1)
+        if len(rows) * len(columns) > max_cells:
+            break
+        cells = sorted({
+            geohash_encode(
+                min(-90 + (row + 0.5) * height, 90.0),
+                min(-180 + (column + 0.5) * width, 180.0),
+                precision,
+            )
+            for row in rows
+            for column in columns
+        })
+    return cells
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """``(min_lat, min_lon, max_lat, max_lon)`` of the box circumscribing a circle."""
+    delta_lat = radius_km / KM_PER_DEGREE
+    delta_lon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+    return (
+        latitude - delta_lat,
+        max(longitude - delta_lon, -180.0),
+        latitude + delta_lat,
+        min(longitude + delta_lon, 180.0),
+    )
+
+
+def haversine_expression(latitude, longitude, lat_field="latitude", lon_field="longitude"):
+    """Great-circle distance in km from the given point to each row, as a query expression."""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2, lon2 = Radians(F(lat_field)), Radians(F(lon_field))
+    a = (
+        Power(Sin((lat2 - lat1) / 2), 2)
+        + math.cos(lat1) * Cos(lat2) * Power(Sin((lon2 - lon1) / 2), 2)
+    )
+    # Least() guards asin against rounding pushing the argument just above 1
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), 1.0), output_field=FloatField())
+
+
+def within_bbox(queryset, min_lat, min_lon, max_lat, max_lon, geohash_field="geohash"):
+    """Rows inside the box: geohash prefix scans narrow the candidates, the exact comparison refines them."""
+    cells = geohash_cover(min_lat, min_lon, max_lat, max_lon)
+    prefilter = reduce(or_, (Q(**{f"{geohash_field}__startswith": cell}) for cell in cells if cell), Q())
+    return queryset.filter(
+        prefilter,
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lon, max_lon),
+    )
+
+
+def nearby(queryset, latitude, longitude, radius_km, geohash_field="geohash"):
+    """Rows within ``radius_km`` of the point, annotated with ``distance`` (km) and sorted by it."""
+    queryset = within_bbox(queryset, *bounding_box(latitude, longitude, radius_km), geohash_field=geohash_field)
+    return queryset.annotate(distance=haversine_expression(latitude, longitude)).filter(
+        distance__lte=radius_km
+    ).order_by("distance", "id")
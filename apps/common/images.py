@@ -0,0 +1,103 @@
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from apps.common.models import FileType, MediaDerivative
+
+EXIF_ORIENTATION = 0x0112
+
+# format name in settings -> (Pillow format, save options)
+ENCODERS = {
+    "webp": ("WEBP", {"method": 4}),
+    "avif": ("AVIF", {"speed": 6}),
+    "jpeg": ("JPEG", {"optimize": True, "progressive": True}),
+}
+
+
+def derivative_formats():
+    """Configured formats this Pillow build can actually encode."""
+    return [name for name in settings.MEDIA_DERIVATIVE_FORMATS if features.check(name if name != "jpeg" else "jpg")]
+
+
+# order of the sources of one size, most compact first: clients take the first type they support, like <picture>
+SOURCE_ORDER = ("avif", "webp", "jpeg")
+
+
+def group_derivatives(derivatives):
+    """``{size: [derivative, ...]}`` with every generated format of a size, in ``SOURCE_ORDER``."""
+    grouped = {}
+    for derivative in derivatives:
+        grouped.setdefault(derivative.size, []).append(derivative)
+    rank = {name: position for position, name in enumerate(SOURCE_ORDER)}
+    for sources in grouped.values():
+        sources.sort(key=lambda derivative: rank.get(derivative.format, len(rank)))
+    return grouped
+
+
+def open_image(media, max_size):
+    """
+    Decoded, upright copy of the image without any metadata.
+
+    JPEG ``draft`` lets libjpeg decode straight at a reduced scale when the original is
+    much larger than the biggest derivative, which is most of the decoding time saved.
+    """
+    with media.file.open("rb") as source:
+        image = Image.open(source)
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+            width, height = height, width
+        image.draft("RGB", max_size)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    # a fresh image carries no EXIF/ICC/XMP, so nothing personal (e.g. GPS) leaks into derivatives
+    clean = Image.new(image.mode, image.size)
+    clean.paste(image)
+    return clean, (width, height)
+
+
+def encode(image, name):
+    pillow_format, options = ENCODERS[name]
+    if name == "jpeg" and image.mode == "RGBA":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format=pillow_format, quality=settings.MEDIA_DERIVATIVE_QUALITY, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(media):
+    """Create (or replace) every configured size/format of an image ``Media``; returns the number written."""
+    if media.file_type != FileType.IMAGE or not media.file:
+        return 0
+    sizes = settings.MEDIA_DERIVATIVE_SIZES
+    largest = max(sizes.values(), key=lambda bounds: bounds[0] * bounds[1])
+    try:
+        image, original_size = open_image(media, largest)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return 0
+
+    derivatives = []
+    for size, bounds in sizes.items():
+        resized = image.copy()
+        resized.thumbnail(bounds, Image.Resampling.LANCZOS)  # keeps the aspect ratio, never upscales
+        for name in derivative_formats():
+            content = encode(resized, name)
+            derivatives.append((size, name, resized.size, content))
+
+    with transaction.atomic():
+        old_files = [derivative.file for derivative in media.derivatives.all()]
+        media.derivatives.all().delete()
+        for size, name, (width, height), content in derivatives:
+            derivative = MediaDerivative(
+                media=media, size=size, format=name, width=width, height=height, file_size=len(content)
+            )
+            derivative.file.save(f"{size}.{name}", ContentFile(content), save=False)
+            derivative.save()
+        media.width, media.height = original_size
+        media.save(update_fields=["width", "height"])
+        transaction.on_commit(lambda: [file.delete(save=False) for file in old_files])
+    return len(derivatives)
@@ -0,0 +1,110 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.common.models import Media, MediaDerivative
+from apps.common.utils import chunked, file_sha256
+
+storage = Media._meta.get_field("file").storage
+
+
+def hash_file(name):
+    """``(sha256, size)`` of a stored file, ``(None, 0)`` when it is missing."""
+    try:
+        with storage.open(name, "rb") as source:
+            return file_sha256(source), storage.size(name)
+    except FileNotFoundError:
+        return None, 0
+
+
+def collapse(duplicate_ids, keeper_id):
+    """Point every reference to the duplicates at the keeper and delete them; returns the freed files."""
+    freed = []
+    with transaction.atomic():
+        # include_hidden: relations declared with related_name="+" (UploadSession.media) need repointing too
+        relations = (
+            field for field in Media._meta.get_fields(include_hidden=True)
+            if field.auto_created and not field.concrete and (field.one_to_many or field.one_to_one)
+        )
+        for relation in relations:
+            model, field = relation.related_model, relation.field.name
+            related = model._base_manager.filter(**{f"{field}__in": duplicate_ids})
+            if model is MediaDerivative:
+                # the keeper has (or gets) its own, identical ones
+                freed.extend(related.values_list("file", "file_size"))
+                related.delete()
+            else:
+                related.update(**{field: keeper_id})
+        Media.objects.filter(pk__in=duplicate_ids).delete()
+    return freed
+
+
+class Command(BaseCommand):
+    help = "Hash media stored before content addressing and collapse rows with identical content"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Files hashed in parallel")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be collapsed")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.HTTP_NOT_MODIFIED("Hashing media files... wait..."))
+        dry_run, batch_size = options["dry_run"], options["batch_size"]
+        started = time.perf_counter()
+
+        pending = Media.objects.filter(sha256__isnull=True).exclude(file="").order_by("pk").values_list("pk", "file")
+        scanned = hashed = missing = collapsed = reclaimed = 0
+        # sha256 -> (pk, file name) of the row that stays for that content
+        keepers = {}
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            for batch in chunked(pending.iterator(chunk_size=batch_size), batch_size):
+                scanned += len(batch)
+                results = list(pool.map(hash_file, [name for _, name in batch]))
+
+                digests = {digest for digest, _ in results if digest} - keepers.keys()
+                keepers.update(
+                    (digest, (pk, name))
+                    for pk, name, digest in Media.objects.filter(sha256__in=digests).values_list("pk", "file", "sha256")
+                )
+
+                duplicates = {}  # keeper pk -> (file name of the keeper, [(pk, file name) of its duplicates])
+                for (pk, name), (digest, size) in zip(batch, results):
+                    if digest is None:
+                        missing += 1
+                        continue
+                    hashed += 1
+                    if digest not in keepers:
+                        keepers[digest] = (pk, name)
+                        if not dry_run:
+                            Media.objects.filter(pk=pk).update(sha256=digest)
+                        continue
+                    keeper_id, keeper_name = keepers[digest]
+                    duplicates.setdefault(keeper_id, (keeper_name, []))[1].append((pk, name))
+                    if name != keeper_name:
+                        reclaimed += size
+
+                for keeper_id, (keeper_name, rows) in duplicates.items():
+                    collapsed += len(rows)
+                    if dry_run:
+                        continue
+                    freed = collapse([pk for pk, _ in rows], keeper_id)
+                    reclaimed += sum(size for _, size in freed)
+                    for _, name in rows:
+                        if name != keeper_name:
+                            storage.delete(name)
+                    for name, _ in freed:
+                        default_storage.delete(name)
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        verb = "would be" if dry_run else "were"
+        self.stdout.write(
+            f"{scanned} media scanned in {elapsed:.1f}s ({hashed} hashed, {missing} missing files)\n"
+            f"{collapsed} duplicates {verb} collapsed into {len(keepers)} unique files, "
+            f"{reclaimed / 1024 ** 2:,.1f} MiB {verb} reclaimed"
+        )
+        if not dry_run:
+            self.stdout.write(self.style.SUCCESS("media successfully deduplicated"))
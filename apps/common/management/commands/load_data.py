@@ -1,54 +1,163 @@
-import json
+import time
 
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from apps.common.management.commands.translate import translate_to_latin
+from apps.common.gazetteer import invalidate_gazetteer
+from apps.common.management.commands.translate import generate_latin
 from apps.common.models import Country, Region, District, Neighborhood
+from apps.common.utils import iter_json_array
 from core.settings.base import BASE_DIR
 
+COUNTRY_NAME = "O'zbekiston"
+
+
+def known_rows(queryset, parent_field):
+    return {
+        (parent_id, name): pk
+        for parent_id, name, pk in queryset.values_list(f"{parent_field}_id", "name", "id")
+    }
+
+
+class Level:
+    """
+    One level of the gazetteer (regions, districts or neighborhoods).
+
+    Rows are buffered and inserted in batches; ``known`` maps ``(parent_id, name)``
+    of every row already in the database (or pending in dry-run mode) to its id,
+    so parents are resolved from memory instead of one query per row.
+    """
+
+    def __init__(self, model, parent_field, known):
+        self.model = model
+        self.parent_field = parent_field
+        self.known = known
+        self.file_ids = {}
+        self.pending = []
+        self.created = 0
+
+    def add(self, file_pk, parent_id, name):
+        key = (parent_id, name)
+        if key in self.known:
+            self.file_ids[file_pk] = self.known[key]
+            return
+        self.pending.append((file_pk, key))
+
+    def resolve(self, file_pk):
+        return self.file_ids.get(file_pk)
+
+    def flush(self, dry_run):
+        if not self.pending:
+            return
+        new_keys = list(dict.fromkeys(key for _, key in self.pending))
+        self.created += len(new_keys)
+
+        if dry_run:
+            # placeholders keep children of not-yet-created parents distinguishable
+            for key in new_keys:
+                self.known.setdefault(key, ("new", self.model.__name__, key))
+        else:
+            self.model.objects.bulk_create(
+                [self.model(**{f"{self.parent_field}_id": parent_id, "name": name}) for parent_id, name in new_keys],
+                ignore_conflicts=True,
+            )
+            parent_ids = {parent_id for parent_id, _ in new_keys}
+            rows = self.model.objects.filter(
+                **{f"{self.parent_field}_id__in": parent_ids, "name__in": {name for _, name in new_keys}}
+            ).values_list(f"{self.parent_field}_id", "name", "id")
+            self.known.update({(parent_id, name): pk for parent_id, name, pk in rows})
+
+        for file_pk, key in self.pending:
+            self.file_ids[file_pk] = self.known[key]
+        self.pending = []
+
 
 class Command(BaseCommand):
-    help = "Import regions from a JSON file"
+    help = "Import regions, districts and neighborhoods from a JSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", default=BASE_DIR / "apps/common/management/commands/data.json")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be created")
 
-    @transaction.atomic
     def handle(self, *args, **options):
         self.stdout.write(
             self.style.HTTP_NOT_MODIFIED(
                 "Import data... wait...",
             )
         )
+        if options["dry_run"]:
+            self.import_data(options)
+        else:
+            with transaction.atomic():
+                self.import_data(options)
+
+    def import_data(self, options):
+        dry_run, batch_size = options["dry_run"], options["batch_size"]
+        started = time.perf_counter()
+
+        if dry_run:
+            country = Country.objects.filter(name=COUNTRY_NAME).first()
+        else:
+            country, _ = Country.objects.get_or_create(name=COUNTRY_NAME)
+        country_id = country.id if country else ("new", "Country", COUNTRY_NAME)
+
+        regions = Level(Region, "country", known_rows(Region.objects.filter(country=country), "country"))
+        districts = Level(District, "region", known_rows(District.objects.filter(region__country=country), "region"))
+        neighborhoods = Level(
+            Neighborhood, "district",
+            known_rows(Neighborhood.objects.filter(district__region__country=country), "district"),
+        )
 
-        with open(BASE_DIR / "apps/common/management/commands/data.json", "r", encoding='utf-8') as json_file:
-
-            data = json.load(json_file)
-
-            country, created = Country.objects.get_or_create(name="O'zbekiston")
-
-            for item in data:
-
-                if item['model'] == 'common.region':
-
-                    Region.objects.get_or_create(
-                        country_id=country.id,
-                        name=translate_to_latin(item['fields']['title']),
-                    )
-
-                elif item['model'] == 'common.district':
-
-                    print(item['fields']['title'])
-                    region = Region.objects.get(id=item['fields']['region'])
-                    District.objects.get_or_create(
-                        region_id=region.id,
-                        name=translate_to_latin(item['fields']['title'])
-                    )
-
-                elif item['model'] == 'common.neighborhood':
-
-                    district = District.objects.get(id=item['fields']['district'])
-                    Neighborhood.objects.get_or_create(
-                        district_id=district.id,
-                        name=translate_to_latin(item['fields']['title'])
-                    )
-
-        self.stdout.write(self.style.SUCCESS("data successfully imported"))
+        rows = skipped = 0
+        with open(options["file"], "r", encoding="utf-8") as json_file:
+            for item in iter_json_array(json_file):
+                rows += 1
+                model, fields = item["model"], item["fields"]
+                name = generate_latin(fields["title"])
+
+                if model == "common.region":
+                    regions.add(item["pk"], country_id, name)
+                    level = regions
+
+                elif model == "common.district":
+                    if regions.resolve(fields["region"]) is None:
+                        regions.flush(dry_run)
+                    region_id = regions.resolve(fields["region"])
+                    if region_id is None:
+                        skipped += 1
+                        continue
+                    districts.add(item["pk"], region_id, name)
+                    level = districts
+
+                elif model == "common.neighborhood":
+                    if districts.resolve(fields["district"]) is None:
+                        districts.flush(dry_run)
+                    district_id = districts.resolve(fields["district"])
+                    if district_id is None:
+                        skipped += 1
+                        continue
+                    neighborhoods.add(item["pk"], district_id, name)
+                    level = neighborhoods
+
+                else:
+                    skipped += 1
+                    continue
+
+                if len(level.pending) >= batch_size:
+                    level.flush(dry_run)
+
+        for level in (regions, districts, neighborhoods):
+            level.flush(dry_run)
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        verb = "would be created" if dry_run else "created"
+        self.stdout.write(
+            f"{rows} rows read in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/sec), {skipped} skipped\n"
+            f"regions {verb}: {regions.created}, districts {verb}: {districts.created}, "
+            f"neighborhoods {verb}: {neighborhoods.created}"
+        )
+        if not dry_run:
+            # bulk_create sends no signals, so invalidate the gazetteer cache explicitly
+            transaction.on_commit(invalidate_gazetteer)
+            self.stdout.write(self.style.SUCCESS("data successfully imported"))
@@ -1,4 +1,15 @@
+import collections
+import functools
+import hashlib
+import operator
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.common.cache import LRUCache
+from apps.common.utils import chunked
 
 retranslit_words = {'mesenat': 'меценат', 'nuqtayi nazar': 'нуқтаи назар', 'biolyuminessensiya': 'биолюминесценция',
                     'differensiatsiya': 'дифференциация', 'gallyutsinatsiya': 'галлюцинация',
@@ -310,7 +321,9 @@ def replace_words_l2c(text, a):
     return text
 
 
-def translate_to_cyrillic(text):
+# Reference implementation: every rule is a separate ``re.sub`` call. It is kept
+# as the golden output the compiled engine below must reproduce byte for byte.
+def reference_translate_to_cyrillic(text):
     text = re.sub("Gʻ|Gʼ|G’|G'|G`|G‘", "Ғ", text)
     text = re.sub("gʻ|gʼ|g’|g'|g`|g‘", "ғ", text)
     text = re.sub("Oʻ|Oʼ|O’|O'|O`|O‘", "Ў", text)
@@ -359,7 +372,7 @@ def translate_to_cyrillic(text):
     return text
 
 
-def translate_to_latin(text):
+def reference_translate_to_latin(text):
     text = re.sub("\"([^\"]+)\"", '"\\1"', text)
     text = re.sub("«([^»]+)»", '"\\1"', text)
     text = replace_array(text, c_letters_c2l, l_letters_c2l)
@@ -396,9 +409,388 @@ def translate_to_latin(text):
     return text
 
 
+_REGEX_META = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+def _is_inert(replacements, patterns):
+    """Check that inserting ``replacements`` into a text can never create a new match of ``patterns``."""
+    alphabet = set("".join(patterns))
+    shortest = min(map(len, patterns))
+    for value in replacements:
+        if not value:
+            if shortest > 1:
+                return False
+            continue
+        if value[0] in alphabet or value[-1] in alphabet:
+            return False
+        run = 0
+        for char in value:
+            run = run + 1 if char in alphabet else 0
+            if run >= shortest:
+                return False
+    return True
+
+
+def _overlaps(lower, higher):
+    """Check whether ``lower`` can start before ``higher`` and consume part of its match."""
+    if higher in lower[1:]:
+        return True
+    return any(lower[-size:] == higher[:size] for size in range(1, min(len(lower), len(higher) + 1)))
+
+
+def _trie_pattern(words):
+    """Regex alternation of ``words`` factored into a prefix tree, so matching never backtracks across siblings."""
+    tree = {}
+    for word in words:
+        node = tree
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) if char else "" for char, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(tree)
+
+
+class SequentialRules:
+    """
+    Precompiled ``re.sub`` rules applied in order.
+
+    A rule may carry a third element: a literal every match contains. The rule
+    is skipped without running the regex when the literal is not in the text.
+    """
+
+    def __init__(self, rules):
+        self.steps = []
+        for pattern, repl, *required in rules:
+            step = functools.partial(re.compile(pattern).sub, repl)
+            self.steps.append((step, required[0] if required else ""))
+
+    def __call__(self, text):
+        for step, required in self.steps:
+            if required in text:
+                text = step(text)
+        return text
+
+
+class LetterTable:
+    """
+    Compiled equivalent of ``replace_array``.
+
+    Neighbouring letters that cannot interfere with each other share one pass:
+    an alternation regex with a dict lookup for digraphs and a ``str.translate``
+    map for single letters.
+    """
+
+    def __init__(self, sources, targets):
+        passes = [[]]
+        for source, target in zip(sources, targets):
+            current = passes[-1]
+            if current and (
+                    (len(current[-1][0]) > 1) != (len(source) > 1)
+                    or any(_overlaps(source, pattern) for pattern, _ in current)
+                    or not _is_inert([repl for _, repl in current], [source])
+            ):
+                current = []
+                passes.append(current)
+            current.append((source, target))
+
+        self.steps = []
+        for rules in passes:
+            table = {}
+            for source, target in rules:
+                table.setdefault(source, target)
+            if all(len(source) == 1 for source in table):
+                self.steps.append(operator.methodcaller("translate", str.maketrans(table)))
+            else:
+                regex = re.compile("|".join(map(re.escape, table)))
+                self.steps.append(functools.partial(regex.sub, lambda match, lookup=table: lookup[match.group()]))
+
+    def __call__(self, text):
+        for step in self.steps:
+            text = step(text)
+        return text
+
+
+class Dictionary:
+    """
+    Compiled equivalent of ``replace_parts`` / ``replace_words_l2c``.
+
+    Only keys that literally occur in the text are substituted, still in the
+    dictionary order, so a typical string costs one scan with a prefix-tree
+    regex instead of hundreds of ``re.sub`` calls. Tables whose replacements
+    could produce new matches fall back to running every rule.
+    """
+
+    def __init__(self, table, word_boundary=False):
+        prefix = "\\b" if word_boundary else ""
+        self.rules = [functools.partial(re.compile(prefix + key).sub, repl) for key, repl in table.items()]
+        self.literal = not any(_REGEX_META.search(key) for key in table) and _is_inert(table.values(), table)
+        self.gram = min(map(len, table))
+        self.buckets = {}
+        for index, key in enumerate(table):
+            self.buckets.setdefault(key[:self.gram], []).append((index, key))
+        self.finder = re.compile("(?=(%s))" % _trie_pattern(self.buckets))
+
+    def candidates(self, text):
+        return sorted(
+            index
+            for head in set(self.finder.findall(text))
+            for index, key in self.buckets[head]
+            if key in text
+        )
+
+    def __call__(self, text):
+        if self.literal:
+            rules = [self.rules[index] for index in self.candidates(text)]
+        else:
+            rules = self.rules
+        for rule in rules:
+            text = rule(text)
+        return text
+
+
+class Transliterator:
+    """Chain of compiled steps producing the same output as the reference functions."""
+
+    def __init__(self, *steps):
+        self.steps = steps
+
+    def __call__(self, text):
+        for step in self.steps:
+            text = step(text)
+        return text
+
+
+_CYRILLIC_LETTERS = "БВГДЕЁЖЗИЙКЛМНПРСТФХЦЧШЪЫЬЭЮЯЎҚҒҲбвгдеёжзийклмнпрстфхцчшъыьэюяўқғҳ"
+
+to_cyrillic = Transliterator(
+    SequentialRules([
+        ("Gʻ|Gʼ|G’|G'|G`|G‘", "Ғ", "G"),
+        ("gʻ|gʼ|g’|g'|g`|g‘", "ғ", "g"),
+        ("Oʻ|Oʼ|O’|O'|O`|O‘", "Ў", "O"),
+        ("oʻ|oʼ|o’|o'|o`|o‘", "ў", "o"),
+        ("ʻ|’|'|`|‘", "ʼ"),
+        ("\\bMЎJ", "МЎЪЖ", "MЎJ"),
+        ("\\bMўj", "Мўъж", "Mўj"),
+        ("\\bmўj", "мўъж", "mўj"),
+        ("\\bMЎT", "МЎЪТ", "MЎT"),
+        ("\\bMўt", "Мўът", "Mўt"),
+        ("\\bmўt", "мўът", "mўt"),
+        ("“([^“”]+)”", '«\\1»', "“"),
+        ("([^\"]+)", '«\\1»'),
+        ("-da\\b", "dа", "-da"),
+        ("-ku\\b", "ku", "-ku"),
+        ("-chi\\b", "chi", "-chi"),
+        ("-yu\\b", "yu", "-yu"),
+        ("-u\\b", "u", "-u"),
+    ]),
+    Dictionary(pre_retranslit),
+    Dictionary(retranslit_words, word_boundary=True),
+    Dictionary(post_retranslit),
+    SequentialRules([
+        ("ʼ([A-Z])", "Ъ\\1", "ʼ"),
+        ("ʼ([a-z])", "ъ\\1", "ʼ"),
+        ("([ОЕOE])ʼ", "\\1Ъ", "ʼ"),
+        ("([оеoe])ʼ", "\\1ъ", "ʼ"),
+    ]),
+    LetterTable(l_letters_l2c, c_letters_l2c),
+    SequentialRules([
+        ("\\[ь\\]([a-zа-яўқғҳ])", "\\1", "[ь]"),
+        ("\\[Ь\\]([A-ZА-ЯЎҚҒҲ])", "\\1", "[Ь]"),
+        ("\\[ь\\]([^\\w])|\\[ь\\]$", "ь\\1", "[ь]"),
+        ("\\[Ь\\]([^\\w])|\\[Ь\\]$", "Ь\\1", "[Ь]"),
+        (f"^E|([^{_CYRILLIC_LETTERS}])E|([\\s+])E", "\\1\\2Э", "E"),
+        (f"^e|([^{_CYRILLIC_LETTERS}])e|([\\s+])e", "\\1\\2э", "e"),
+        ("e", "е", "e"),
+        ("([аоу])эв", "\\1ев", "эв"),
+        ("([АаОоУу])ЭВ", "\\1ЕВ", "ЭВ"),
+        ("(\\d+)-(январ|феврал|март|апрел|май|июн|июл|август|сентябр|октябр|ноябр|декабр"
+         + "|ЯНВАР|ФЕВРАЛ|МАРТ|АПРЕЛ|МАЙ|ИЮН|ИЮЛ|АВГУСТ|СЕНТЯБР|ОКТЯБР|НОЯБР|ДЕКАБР)", "\\1 \\2", "-"),
+        ("(\\d+)-(йил|ЙИЛ|й\\.)", "\\1 \\2", "-"),
+        (f"([^{_CYRILLIC_LETTERS}])Яна-да([^{_CYRILLIC_LETTERS}])", "\\1Янада\\2", "Яна-да"),
+        (f"([^{_CYRILLIC_LETTERS}])яна-да([^{_CYRILLIC_LETTERS}])", "\\1янада\\2", "яна-да"),
+    ]),
+)
+
+to_latin = Transliterator(
+    SequentialRules([
+        ("\"([^\"]+)\"", '"\\1"', '"'),
+        ("«([^»]+)»", '"\\1"', "«"),
+    ]),
+    LetterTable(c_letters_c2l, l_letters_c2l),
+    SequentialRules([
+        ("([A-Z])Ё|Ё([A-Z])", "\\1YO\\2", "Ё"),
+        ("Ё([a-z])|Ё(\\s+)|Ё", "Yo\\1\\2", "Ё"),
+        ("([A-Z])Ч|Ч([A-Z])", "\\1CH\\2", "Ч"),
+        ("Ч([a-z])|Ч(\\s+)|Ч", "Ch\\1\\2", "Ч"),
+        ("([A-Z])Ш|Ш([A-Z])", "\\1SH\\2", "Ш"),
+        ("Ш([a-z])|Ш(\\s+)|Ш", "Sh\\1\\2", "Ш"),
+        ("([A-Z])Ю|Ю([A-Z])", "\\1YU\\2", "Ю"),
+        ("Ю([a-z])|Ю(\\s+)|Ю", "Yu\\1\\2", "Ю"),
+        ("([A-Z])Я|Я([A-Z])", "\\1YA\\2", "Я"),
+        ("Я([a-z])|Я(\\s+)|Я", "Ya\\1\\2", "Я"),
+        ("([AOUЕI])Ц([AOUЕI])", "\\1TS\\2", "Ц"),
+        ("([aouеi])ц([aouеi])", "\\1ts\\2", "ц"),
+        ("Ц", "S", "Ц"),
+        ("ц", "s", "ц"),
+        ("([^\\w])Е([A-Z])|([AOUEI])Е([A-Z])|^Е([A-Z])", "\\1\\3YE\\2\\4\\5", "Е"),
+        ("([^\\w])Е([a-z])|([^\\w])Е([^\\w])|^Е([a-z])|^Е([^\\w])'|([^\\w])Е", "\\1\\3\\7Ye\\2\\4\\5\\6", "Е"),
+        ("Е", "E", "Е"),
+        ("^е|([^\\w])е|([aouei])е", "\\1\\2ye", "е"),
+        ("е", "e", "е"),
+        ("[ʻ’'`‘]+", "‘"),
+        ("ʻʼ", "ʻ", "ʻʼ"),
+        ("‘ʼ", "ʻ", "‘ʼ"),
+        ("(\\d+)\\s+(yanvar|fevral|mart|aprel|may|iyun|iyul|avgust|sentyabr|oktyabr|noyabr|dekabr|"
+         + "YANVAR|FEVRAL|MART|APREL|MAY|IYUN|IYUL|AVGUST|SENTYABR|OKTYABR|NOYABR|DEKABR)", "\\1-\\2"),
+        ("(\\d{3,4})\\s+(yil|YIL|y\\.)", "\\1-\\2"),
+        ("\\bnuqtai nazar", "nuqtayi nazar", "nuqtai nazar"),
+        ("\\btarjimai hol", "tarjimayi hol", "tarjimai hol"),
+        ("\\byanada\\b", "yana-da", "yanada"),
+    ]),
+)
+
+
+def translate_to_cyrillic(text):
+    return to_cyrillic(text)
+
+
+def translate_to_latin(text):
+    return to_latin(text)
+
+
+DIRECTIONS = {
+    "latin": translate_to_latin,
+    "cyrillic": translate_to_cyrillic,
+}
+
+
+def _translate_chunk(direction, texts):
+    function = DIRECTIONS[direction]
+    return [function(text) if text else text for text in texts]
+
+
+def translate_many(texts, direction="latin", workers=1, chunk_size=1000):
+    """
+    Lazily transliterate ``texts``, yielding results in input order.
+
+    Empty values are passed through untouched. With ``workers > 1`` chunks are
+    fanned out to a process pool; at most two chunks per worker are in flight,
+    so arbitrarily large iterables are streamed with bounded memory.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction {direction!r}, expected one of {sorted(DIRECTIONS)}")
+
+    if workers <= 1:
+        for chunk in chunked(texts, chunk_size):
+            yield from _translate_chunk(direction, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for chunk in chunked(texts, chunk_size):
+            pending.append(pool.submit(_translate_chunk, direction, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class CachedTransliteration:
+    """
+    Memoizes a transliteration function for short, frequently repeated strings.
+
+    The first tier is a per-process LRU. With ``TRANSLIT_CACHE_REDIS`` enabled,
+    local misses fall through to the shared Django cache, so gunicorn workers
+    reuse each other's results.
+    """
+
+    def __init__(self, function, direction):
+        self.function = function
+        self.direction = direction
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self._local = None
+
+    @property
+    def local(self):
+        if self._local is None:
+            self._local = LRUCache(
+                max_entries=settings.TRANSLIT_CACHE_MAX_ENTRIES,
+                max_size=settings.TRANSLIT_CACHE_MAX_CHARS,
+            )
+        return self._local
+
+    def __call__(self, text):
+        if not text or len(text) > settings.TRANSLIT_CACHE_MAX_LENGTH:
+            return self.function(text)
+
+        result = self.local.get(text)
+        if result is not None:
+            return result
+
+        if settings.TRANSLIT_CACHE_REDIS:
+            result = self.shared_lookup(text)
+        else:
+            result = self.function(text)
+
+        self.local.set(text, result)
+        return result
+
+    def shared_lookup(self, text):
+        shared = caches[settings.TRANSLIT_CACHE_ALIAS]
+        key = f"translit:{self.direction}:{hashlib.sha1(text.encode()).hexdigest()}"
+        try:
+            result = shared.get(key)
+        except Exception:  # the shared tier is optional, an unreachable Redis must not break transliteration
+            return self.function(text)
+
+        if result is not None:
+            self.redis_hits += 1
+            return result
+
+        self.redis_misses += 1
+        result = self.function(text)
+        try:
+            shared.set(key, result, settings.TRANSLIT_CACHE_TIMEOUT)
+        except Exception:
+            pass
+        return result
+
+    def stats(self):
+        return {
+            **self.local.stats(),
+            "redis": settings.TRANSLIT_CACHE_REDIS,
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+        }
+
+
+cached_latin = CachedTransliteration(translate_to_latin, "latin")
+cached_cyrillic = CachedTransliteration(translate_to_cyrillic, "cyrillic")
+
+
+def cache_stats():
+    return {
+        "latin": cached_latin.stats(),
+        "cyrillic": cached_cyrillic.stats(),
+    }
+
+
 def generate_latin(field):
     try:
-        result = translate_to_latin(field)
+        result = cached_latin(field)
+        return result
+    except Exception:
+        pass
+
+
+def generate_cyrillic(field):
+    try:
+        result = cached_cyrillic(field)
         return result
     except Exception:
         pass
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.management.commands import translate
+
+SAMPLE_TEXTS = [
+    "Toshkent shahri, Yunusobod tumani, 4-mavze",
+    "Oʻzbekiston Respublikasi Prezidentining farmoni",
+    "G'ijduvon tumani, Sho'rtepa mahallasi",
+    "Ko'chmas mulk: 3 xonali kvartira, yevroremont, 12-yanvar 2024 yil",
+    "Ijara haqi oyiga 500 dollar, \"Yangi hayot\" mahallasi",
+    "nuqtai nazar, tarjimai hol, yanada yaxshi, yana-da",
+    "Mo'tabar mo'jiza, MO'JIZA, sirka, prinsip, versiya, pensiya",
+    "Тошкент шаҳри, Юнусобод тумани, 4-мавзе",
+    "Ўзбекистон Республикаси Президентининг фармони",
+    "Ғиждувон тумани, Шўртепа маҳалласи",
+    "Кўчмас мулк: 3 хонали квартира, евроремонт, 12 январ 2024 йил",
+    "«Янги ҳаёт» маҳалласи, цирк, концерт, эълон, съезд, ЁШЛАР, Ёшлар",
+]
+
+
+def golden_corpus():
+    """Texts covering every dictionary entry and letter table, plus real-life samples."""
+    corpus = list(SAMPLE_TEXTS)
+    for table in (translate.pre_retranslit, translate.retranslit_words, translate.post_retranslit):
+        corpus.extend(table)
+        corpus.extend(table.values())
+    corpus.append(" ".join(translate.l_letters_l2c))
+    corpus.append(" ".join(translate.c_letters_c2l))
+    corpus.append("".join(translate.c_letters_c2l))
+    corpus.extend(translate.complex_words)
+    return corpus
+
+
+class Command(BaseCommand):
+    help = "Check the compiled transliteration engine against the reference functions and measure throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Extra corpus, one text per line")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the corpus")
+
+    def handle(self, *args, **options):
+        corpus = golden_corpus()
+        if options["file"]:
+            with open(options["file"], encoding="utf-8") as corpus_file:
+                corpus.extend(line.rstrip("\n") for line in corpus_file if line.strip())
+
+        directions = (
+            ("latin", translate.reference_translate_to_latin, translate.translate_to_latin),
+            ("cyrillic", translate.reference_translate_to_cyrillic, translate.translate_to_cyrillic),
+        )
+
+        mismatches = 0
+        for direction, reference, compiled in directions:
+            for text in corpus:
+                expected, actual = reference(text), compiled(text)
+                if expected != actual:
+                    mismatches += 1
+                    self.stderr.write(f"[{direction}] {text!r}: expected {expected!r}, got {actual!r}")
+        if mismatches:
+            raise CommandError(f"{mismatches} mismatches against the reference output")
+        self.stdout.write(self.style.SUCCESS(f"{len(corpus)} texts match the reference output in both directions"))
+
+        chars = sum(map(len, corpus)) * options["repeat"]
+        for direction, reference, compiled in directions:
+            before = self.measure(reference, corpus, options["repeat"])
+            after = self.measure(compiled, corpus, options["repeat"])
+            self.stdout.write(
+                f"{direction:>8}: reference {chars / before:,.0f} chars/sec, "
+                f"compiled {chars / after:,.0f} chars/sec ({before / after:.1f}x)"
+            )
+
+    @staticmethod
+    def measure(function, corpus, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for text in corpus:
+                function(text)
+        return time.perf_counter() - started
@@ -0,0 +1,93 @@
+import itertools
+import json
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.management.commands.translate import DIRECTIONS, translate_many
+from apps.common.utils import chunked
+
+
+class Command(BaseCommand):
+    help = "Transliterate a model field or a JSONL file in bulk"
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument("--model", help="Model as app_label.ModelName, e.g. common.Region")
+        source.add_argument("--jsonl", help="Input JSONL file, one object per line")
+
+        parser.add_argument("--field", required=True, help="Field (or JSON key) holding the source text")
+        parser.add_argument("--target", help="Field (or JSON key) to write to, defaults to --field")
+        parser.add_argument("--output", help="Output JSONL file, required with --jsonl")
+        parser.add_argument("--direction", choices=sorted(DIRECTIONS), default="latin")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=1, help="Processes to fan out to")
+
+    def handle(self, *args, **options):
+        options["target"] = options["target"] or options["field"]
+        self.started = time.perf_counter()
+
+        if options["model"]:
+            rows, chars = self.transliterate_model(options)
+        else:
+            if not options["output"]:
+                raise CommandError("--output is required with --jsonl")
+            rows, chars = self.transliterate_jsonl(options)
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(self.style.SUCCESS(f"{rows} rows ({chars} chars) transliterated in {elapsed:.1f}s"))
+
+    def transliterate_model(self, options):
+        try:
+            model = apps.get_model(options["model"])
+        except (LookupError, ValueError) as exc:
+            raise CommandError(exc)
+
+        field, target = options["field"], options["target"]
+        manager = model._base_manager
+        fields = {model._meta.pk.name, field, target}
+        queryset = manager.only(*fields).order_by("pk").iterator(chunk_size=options["chunk_size"])
+
+        objects, pending = itertools.tee(queryset)
+        texts = (getattr(obj, field) for obj in pending)
+        results = translate_many(texts, options["direction"], options["workers"], options["chunk_size"])
+
+        rows = chars = 0
+        for batch in chunked(zip(objects, results), options["chunk_size"]):
+            changed = []
+            for obj, value in batch:
+                chars += len(getattr(obj, field) or "")
+                if getattr(obj, target) != value:
+                    setattr(obj, target, value)
+                    changed.append(obj)
+            manager.bulk_update(changed, [target])
+            rows += len(batch)
+            self.report(rows, chars)
+        return rows, chars
+
+    def transliterate_jsonl(self, options):
+        field, target = options["field"], options["target"]
+
+        with open(options["jsonl"], encoding="utf-8") as source, open(options["output"], "w", encoding="utf-8") as out:
+            records, pending = itertools.tee(json.loads(line) for line in source if line.strip())
+            texts = (record.get(field) for record in pending)
+            results = translate_many(texts, options["direction"], options["workers"], options["chunk_size"])
+
+            rows = chars = 0
+            for batch in chunked(zip(records, results), options["chunk_size"]):
+                for record, value in batch:
+                    chars += len(record.get(field) or "")
+                    record[target] = value
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                rows += len(batch)
+                self.report(rows, chars)
+        return rows, chars
+
+    def report(self, rows, chars):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        self.stdout.write(
+            self.style.HTTP_NOT_MODIFIED(
+                f"{rows} rows in {elapsed:.1f}s: {rows / elapsed:,.0f} rows/sec, {chars / elapsed:,.0f} chars/sec"
+            )
+        )
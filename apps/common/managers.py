@@ -1,17 +1,41 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.dispatch import Signal
 
 from apps.common.utils import tashkent_now
 
+# soft deletes are plain UPDATEs, so post_delete never fires; these are sent instead with ``pks`` of the rows
+soft_deleted = Signal()
+restored = Signal()
+
 
 class SoftDeleteQuerySet(models.QuerySet):
     def delete(self):
-        return super().update(is_deleted=True, updated_at=tashkent_now())
+        return self.switch_deleted(True, soft_deleted)
 
     def hard_delete(self):
         return super().delete()
 
     def restore(self):
-        return self.update(is_deleted=False, updated_at=tashkent_now())
+        return self.switch_deleted(False, restored)
+
+    def switch_deleted(self, is_deleted, signal):
+        """
+        Flip ``is_deleted`` and send ``signal`` with the pks of the rows that actually changed state.
+
+        The rows are locked before the UPDATE, so of two concurrent deletes (or restores) of the
+        same row only the first reports it and receivers can keep counters exact.
+        """
+        with transaction.atomic(using=self.db):
+            pks = list(
+                self.filter(is_deleted=not is_deleted).select_for_update().values_list("pk", flat=True)
+            )
+            if not pks:
+                return 0
+            updated = self.model._base_manager.using(self.db).filter(pk__in=pks).update(
+                is_deleted=is_deleted, updated_at=tashkent_now()
+            )
+            signal.send(sender=self.model, pks=pks)
+        return updated
 
 
 class SoftDeleteManager(models.Manager):
@@ -23,3 +47,25 @@ class SoftDeleteManager(models.Manager):
 
     def only_deleted(self):
         return SoftDeleteQuerySet(self.model, using=self._db).filter(is_deleted=True)
+
+
+class MediaManager(models.Manager):
+    def store(self, content, file_name=None):
+        """
+        ``(media, created)`` for an uploaded file: the blob is written (or found) first and
+        an existing ``Media`` with the same content hash is returned instead of a new row.
+        """
+        media = self.model(file=content, file_name=file_name or content.name)
+        media.save_file()
+        existing = self.filter(sha256=media.sha256).first()
+        if existing is None:
+            try:
+                with transaction.atomic():
+                    media.save(force_insert=True)
+                return media, True
+            except IntegrityError:
+                existing = self.get(sha256=media.sha256)
+        if existing.file.name != media.file.name:
+            # same bytes under another extension, the new blob is referenced by nothing
+            media.file.storage.delete(media.file.name)
+        return existing, False
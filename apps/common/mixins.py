@@ -0,0 +1,88 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.cache import gazetteer_version
+
+
+def etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def negotiate_encoding(request, available=("br", "gzip")):
+    """
+    Content coding from ``available`` with the highest q-value in Accept-Encoding (earlier
+    entries win ties), ``"identity"`` when none is acceptable; ``q=0`` means "not acceptable".
+    """
+    weights = {}
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            weights[name.lower()] = quality
+
+    best, best_quality = "identity", 0.0
+    for name in available:
+        quality = weights.get(name, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class VersionedCacheListMixin:
+    """
+    Serve list responses as pre-rendered JSON cached per data version.
+
+    The cache key includes the version returned by ``get_cache_version`` and the
+    full request path, so bumping the version invalidates every page at once.
+    A hit costs two cache reads and no ORM or serializer work; clients sending a
+    matching ``If-None-Match`` get an empty 304.
+    """
+
+    cache_prefix = "gazetteer"
+    cache_timeout = settings.GAZETTEER_CACHE_TIMEOUT
+    cache_max_age = settings.GAZETTEER_CACHE_MAX_AGE
+
+    def get_cache_version(self):
+        return gazetteer_version()
+
+    def get_cache_key(self, request):
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f"{self.cache_prefix}:{self.get_cache_version()}:{path}"
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            body = JSONRenderer().render(response.data)
+            cached = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+            cache.set(key, cached, self.cache_timeout)
+
+        etag, body = cached
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, max_age=self.cache_max_age)
+        return response
+
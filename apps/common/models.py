@@ -1,9 +1,11 @@
 import mimetypes
 import uuid
 
+from django.conf import settings
 from django.db import models
 
-from apps.common.managers import SoftDeleteManager
+from apps.common.managers import MediaManager, SoftDeleteManager, restored, soft_deleted
+from apps.common.storage import blob_sha256, content_addressed_storage
 from apps.common.utils import tashkent_now
 
 
@@ -32,16 +34,20 @@ class BaseModel(models.Model):
         )
 
     def delete(self, using=None, keep_parents=False):
-        self.__class__.objects.filter(pk=self.pk).update(
+        updated = self.__class__.objects.filter(pk=self.pk).update(
             is_deleted=True,
             updated_at=tashkent_now()
         )
+        if updated:
+            soft_deleted.send(sender=self.__class__, pks=[self.pk])
 
     def restore(self):
-        self.__class__.objects.filter(pk=self.pk).update(
+        updated = self.__class__.all_objects.filter(pk=self.pk, is_deleted=True).update(
             is_deleted=False,
             updated_at=tashkent_now()
         )
+        if updated:
+            restored.send(sender=self.__class__, pks=[self.pk])
 
     def hard_delete(self, using=None, keep_parents=False):
         super().delete(using=using, keep_parents=keep_parents)
@@ -101,25 +107,40 @@ def upload_to(instance, filename):
 
 class Media(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    file = models.FileField(upload_to=upload_to)
+    # stored as media/blobs/<sha256>.<ext>, identical uploads resolve to one row (see MediaManager.store)
+    file = models.FileField(upload_to=upload_to, storage=content_addressed_storage)
     file_type = models.IntegerField(choices=FileType.choices, default=FileType.OTHER)
     file_name = models.CharField(max_length=255, blank=True, null=True)
+    sha256 = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    # filled in for images by the derivative pipeline (apps.common.images)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
 
-    def save(self, *args, **kwargs):
-        if self.file:
-            self.file_name = self.file_name or self.file.name
+    objects = MediaManager()
+
+    def save_file(self):
+        """Detect the file type and write the blob, ``sha256`` is taken from the blob name."""
+        self.file_name = self.file_name or self.file.name
 
-            content_type, _ = mimetypes.guess_type(self.file.name)
-            main_type = content_type.split('/')[0] if content_type else None
+        content_type, _ = mimetypes.guess_type(self.file.name)
+        main_type = content_type.split('/')[0] if content_type else None
 
-            self.file_type = {
-                'image': FileType.IMAGE,
-                'video': FileType.VIDEO,
-                'audio': FileType.AUDIO,
-                'application': FileType.DOCUMENT,
-                'text': FileType.DOCUMENT,
-            }.get(main_type, FileType.OTHER)
+        self.file_type = {
+            'image': FileType.IMAGE,
+            'video': FileType.VIDEO,
+            'audio': FileType.AUDIO,
+            'application': FileType.DOCUMENT,
+            'text': FileType.DOCUMENT,
+        }.get(main_type, FileType.OTHER)
 
+        if not self.file._committed:
+            # write the blob before the row, its name carries the content hash
+            self.file.save(self.file.name, self.file.file, save=False)
+        self.sha256 = blob_sha256(self.file.name) or self.sha256
+
+    def save(self, *args, **kwargs):
+        if self.file:
+            self.save_file()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -128,3 +149,60 @@ class Media(models.Model):
     class Meta:
         verbose_name = "Media File"
         verbose_name_plural = "Media Files"
+
+
+class DerivativeSize(models.TextChoices):
+    THUMBNAIL = 'thumbnail', 'Thumbnail'
+    CARD = 'card', 'Card'
+    FULL = 'full', 'Full'
+
+
+def derivative_upload_to(instance, filename):
+    return f"media/derivatives/{instance.media_id}/{filename}"
+
+
+class MediaDerivative(models.Model):
+    media = models.ForeignKey(Media, on_delete=models.CASCADE, related_name="derivatives")
+    size = models.CharField(max_length=16, choices=DerivativeSize.choices)
+    format = models.CharField(max_length=8)
+    file = models.FileField(upload_to=derivative_upload_to)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file_size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.media_id} {self.size}.{self.format}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["media", "size", "format"], name="unique_media_derivative"),
+        ]
+        verbose_name = "Media Derivative"
+        verbose_name_plural = "Media Derivatives"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload in progress: chunks are appended to a partial file on disk
+    (see apps.common.uploads) and ``offset`` is how many bytes have been stored so far.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    file_name = models.CharField(max_length=255)
+    file_size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    offset = models.PositiveBigIntegerField(default=0)
+    media = models.ForeignKey(Media, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_name} ({self.offset}/{self.file_size})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at"], name="upload_session_updated_idx"),
+        ]
+        verbose_name = "Upload Session"
+        verbose_name_plural = "Upload Sessions"
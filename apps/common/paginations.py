@@ -1,7 +1,199 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'per_page'
     max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique, fully ordered key instead of OFFSET.
+
+    The view declares ``keyset_orderings``: a mapping from ``?ordering=`` values
+    to tuples of fields (``-`` for descending) whose last field must be unique.
+    The cursor stores the key of the last row, so every page is an index range
+    scan regardless of how deep the client has scrolled.
+    """
+
+    page_size = 20
+    page_size_query_param = 'per_page'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+        cursor = request.query_params.get(self.cursor_query_param)
+        return self.paginate_from(queryset, self.decode_cursor(cursor) if cursor else None)
+
+    def paginate_from(self, queryset, key):
+        """The page of rows after ``key`` (the cursor values of the previous page's last row, ``None`` for the first)."""
+        queryset = queryset.order_by(*self.ordering)
+        if key is not None:
+            queryset = queryset.filter(self.cursor_filter(queryset.model, key))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_ordering(self, request, view):
+        orderings = getattr(view, "keyset_orderings", {"default": ("-created_at", "-id")})
+        return orderings.get(request.query_params.get(self.ordering_query_param), next(iter(orderings.values())))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def fields(self):
+        return [(name.lstrip("-"), name.startswith("-")) for name in self.ordering]
+
+    def cursor_filter(self, model, values):
+        """``key > cursor`` in the ordering's direction, spelled out so it works for mixed directions."""
+        fields = self.fields()
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise NotFound("Invalid cursor")
+        try:
+            values = [model._meta.get_field(name).to_python(value) for (name, _), value in zip(fields, values)]
+        except DjangoValidationError:
+            raise NotFound("Invalid cursor")
+
+        condition = Q()
+        for position, (name, descending) in enumerate(fields):
+            step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[position]})
+            for (previous, _), value in zip(fields[:position], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def cursor_values(self, obj):
+        values = []
+        for name, _ in self.fields():
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else str(value))
+        return values
+
+    def encode_cursor(self, obj):
+        return base64.urlsafe_b64encode(json.dumps(self.cursor_values(obj)).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise NotFound("Invalid cursor")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('first', self.get_first_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PromotedKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination with promoted rows placed at fixed ``promoted_slots`` of every page.
+
+    The view's ``get_promoted_ids(offset, count)`` returns the next ranked promoted pks, or
+    ``None`` to paginate normally, and ``organic_queryset(queryset)`` narrows the rows that
+    are paginated by key to the non-promoted ones. Both parts of a page are loaded with one
+    UNION ALL query and the cursor carries the key of the last organic row together with
+    how far the promoted ranking has been consumed.
+    """
+
+    promoted_slots = (0, 1, 6, 11)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.position = None
+        cursor = request.query_params.get(self.cursor_query_param)
+        position = self.decode_cursor(cursor) if cursor else {"key": None, "promoted": 0}
+        if not isinstance(position, dict):
+            # a plain keyset cursor, handed out while slotting was off for these filters
+            return super().paginate_queryset(queryset, request, view)
+        try:
+            key, promoted_offset = position["key"], int(position["promoted"])
+        except (KeyError, TypeError, ValueError):
+            raise NotFound("Invalid cursor")
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+        slots = [slot for slot in self.promoted_slots if slot < self.page_size]
+        ids = view.get_promoted_ids(promoted_offset, len(slots))
+        if ids is None:
+            # slotting is off (e.g. Redis is down): continue unslotted from the last organic row
+            return self.paginate_from(queryset, key)
+
+        organic = view.organic_queryset(queryset).order_by(*self.ordering)
+        if key is not None:
+            organic = organic.filter(self.cursor_filter(queryset.model, key))
+        organic = organic[:self.page_size + 1]
+        rows = list(organic.union(queryset.filter(pk__in=ids).order_by(), all=True)) if ids else list(organic)
+
+        # the union comes back unordered: promoted rows follow the ranking, organic ones the keyset order
+        rank = {pk: order for order, pk in enumerate(ids)}
+        promoted = sorted((row for row in rows if row.pk in rank), key=lambda row: rank[row.pk])
+        organic_rows = [row for row in rows if row.pk not in rank]
+        for name, descending in reversed(self.fields()):
+            organic_rows.sort(key=lambda row: getattr(row, name), reverse=descending)
+
+        self.page, used = [], 0
+        for index in range(self.page_size):
+            if promoted and (index in slots or used == len(organic_rows)):
+                self.page.append(promoted.pop(0))
+            elif used < len(organic_rows):
+                self.page.append(organic_rows[used])
+                used += 1
+        # promoted rows a filter dropped from this page's slots are simply skipped
+        self.has_next = len(organic_rows) > used or len(ids) == len(slots) > 0
+        self.last_organic = organic_rows[used - 1] if used else None
+        self.position = {"key": key, "promoted": promoted_offset + len(ids)}
+        return self.page
+
+    def get_next_link(self):
+        position = self.position
+        if position is None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        key = self.cursor_values(self.last_organic) if self.last_organic is not None else position["key"]
+        cursor = {"key": key, "promoted": position["promoted"]}
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+        )
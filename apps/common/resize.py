@@ -0,0 +1,127 @@
+import fcntl
+import os
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, UnidentifiedImageError
+
+from apps.common.images import derivative_formats, encode, open_image
+
+CONTENT_TYPES = {
+    "webp": "image/webp",
+    "avif": "image/avif",
+    "jpeg": "image/jpeg",
+}
+# hits refresh the file's mtime (the LRU clock) at most this often, so hot files don't cost a write per request
+TOUCH_INTERVAL = 60 * 60
+LOCK_STRIPES = 1024
+
+
+class ResizeError(Exception):
+    pass
+
+
+def cache_root():
+    return Path(settings.MEDIA_RESIZE_CACHE_ROOT)
+
+
+def cache_path(media, width, height, fmt):
+    key = str(media.id)
+    return cache_root() / key[:2] / key / f"{width}x{height}.{fmt}"
+
+
+def lock_path(path):
+    """One of a fixed set of lock files, so locks never pile up next to the cache entries."""
+    return cache_root() / "locks" / f"{zlib.crc32(str(path).encode()) % LOCK_STRIPES}.lock"
+
+
+def validate(width, height, fmt):
+    """Only a fixed set of dimensions is served, otherwise arbitrary sizes in URLs could flood the cache."""
+    allowed = settings.MEDIA_RESIZE_DIMENSIONS
+    if width not in allowed or height not in allowed:
+        raise ResizeError(f"Width and height must be one of {', '.join(map(str, allowed))}.")
+    if fmt not in derivative_formats():
+        raise ResizeError(f"Format must be one of {', '.join(derivative_formats())}.")
+
+
+def touch(path):
+    try:
+        if time.time() - path.stat().st_mtime > TOUCH_INTERVAL:
+            os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def resized(media, width, height, fmt):
+    """
+    Path of the cached resize, generating it on a miss.
+
+    Concurrent misses for the same file queue on an exclusive ``flock`` of its lock file:
+    the first one resizes, the others find the result once they get the lock, so a burst
+    of requests for a popular image costs one decode per worker host.
+    """
+    path = cache_path(media, width, height, fmt)
+    if path.exists():
+        touch(path)
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path(path).parent.mkdir(exist_ok=True)
+    with open(lock_path(path), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if path.exists():
+                return path
+            try:
+                image, _ = open_image(media, (width, height))
+            except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as error:
+                raise ResizeError("File is not a readable image.") from error
+            image.thumbnail((width, height), Image.Resampling.LANCZOS)
+            content = encode(image, fmt)
+
+            with tempfile.NamedTemporaryFile(dir=path.parent, prefix=".", delete=False) as temp:
+                temp.write(content)
+            os.chmod(temp.name, 0o644)
+            os.replace(temp.name, path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return path
+
+
+def prune(max_size=None):
+    """
+    Evict least recently used files until the cache is below 90% of ``max_size`` bytes;
+    returns ``(files removed, bytes freed)``.
+    """
+    max_size = settings.MEDIA_RESIZE_CACHE_MAX_SIZE if max_size is None else max_size
+    entries, total = [], 0
+    for directory, _, files in os.walk(cache_root()):
+        for name in files:
+            # lock files and resizes still being written
+            if name.endswith(".lock") or name.startswith("."):
+                continue
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, os.path.join(directory, name)))
+            total += stat.st_size
+
+    if total <= max_size:
+        return 0, 0
+    removed = freed = 0
+    target = max_size * 0.9
+    entries.sort()
+    for _, size, path in entries:
+        if total - freed <= target:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+        freed += size
+    return removed, freed
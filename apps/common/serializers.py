@@ -1,6 +1,8 @@
+from django.conf import settings
 from rest_framework import serializers
 
-from apps.common.models import Country, Region, District, Neighborhood, Media
+from apps.common.images import group_derivatives
+from apps.common.models import Country, Region, District, Neighborhood, Media, UploadSession
 
 
 class CountryListSerializer(serializers.ModelSerializer):
@@ -40,7 +42,61 @@ class NeighborhoodListSerializer(serializers.ModelSerializer):
 
 
 class MediaSerializer(serializers.ModelSerializer):
+    """
+    ``derivatives`` maps each size (thumbnail, card, full) to its dimensions and ``sources``:
+    one resized copy per generated format, AVIF before WebP before JPEG, for the client to
+    pick the first type it supports. It stays empty until the Celery task ran, so clients
+    fall back to ``file``. Prefetch ``derivatives`` when serializing many.
+    """
+    derivatives = serializers.SerializerMethodField()
+
     class Meta:
         model = Media
         fields = '__all__'
-        read_only_fields = ['file_type', 'file_name']
+        read_only_fields = ['file_type', 'file_name', 'width', 'height']
+
+    def create(self, validated_data):
+        # re-uploads of the same content return the existing Media, ``created`` tells the view which one it got
+        media, self.created = Media.objects.store(validated_data["file"], validated_data.get("file_name"))
+        return media
+
+    def get_derivatives(self, obj):
+        request = self.context.get("request")
+        return {
+            size: {
+                "width": sources[0].width,
+                "height": sources[0].height,
+                "sources": [
+                    {
+                        "url": request.build_absolute_uri(derivative.file.url) if request else derivative.file.url,
+                        "format": derivative.format,
+                        "type": f"image/{derivative.format}",
+                    }
+                    for derivative in sources
+                ],
+            }
+            for size, sources in group_derivatives(obj.derivatives.all()).items()
+        }
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ("id", "file_name", "file_size", "sha256", "offset", "chunk_size", "media", "created_at")
+        read_only_fields = ("offset", "media", "created_at")
+
+    def get_chunk_size(self, obj):
+        return settings.UPLOAD_CHUNK_MAX_SIZE
+
+    def validate_file_size(self, value):
+        if not 0 < value <= settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"Files must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes.")
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(char not in "0123456789abcdef" for char in value)):
+            raise serializers.ValidationError("Expected a hex encoded SHA-256 digest.")
+        return value
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.common.gazetteer import invalidate_gazetteer
+from apps.common.models import Country, Region, District, Neighborhood
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=Region)
+@receiver(post_save, sender=District)
+@receiver(post_save, sender=Neighborhood)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=Region)
+@receiver(post_delete, sender=District)
+@receiver(post_delete, sender=Neighborhood)
+def gazetteer_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_gazetteer)
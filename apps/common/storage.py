@@ -0,0 +1,71 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+from apps.common.utils import file_sha256
+
+BLOB_PREFIX = "media/blobs"
+BLOB_NAME = re.compile(rf"^{BLOB_PREFIX}/[0-9a-f]{{2}}/(?P<sha256>[0-9a-f]{{64}})(\.\w+)?$")
+
+
+def blob_name(sha256, extension=""):
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}{extension}"
+
+
+def blob_sha256(name):
+    """Content hash encoded in a blob name, ``None`` for files stored before content addressing."""
+    match = BLOB_NAME.match(name or "")
+    return match["sha256"] if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file under the SHA-256 of its content, so identical uploads share one blob.
+
+    Chunks are hashed while they are written to a temporary file next to the blobs, which is
+    then renamed into place (or dropped when the blob already exists); uploads Django already
+    spooled to disk are hashed in place and moved. The name passed in only donates its extension.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        if hasattr(content, "temporary_file_path"):
+            source = content.temporary_file_path()
+            name = blob_name(file_sha256(source), extension)
+            if not self.exists(name):
+                os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+                file_move_safe(source, self.path(name))
+                self.set_permissions(name)
+            return name
+
+        temp_dir = self.path(f"{BLOB_PREFIX}/tmp")
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                temp.write(chunk)
+
+        name = blob_name(digest.hexdigest(), extension)
+        if self.exists(name):
+            os.unlink(temp.name)
+        else:
+            os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+            # atomic, so a concurrent upload of the same content never sees a half written blob
+            os.replace(temp.name, self.path(name))
+            self.set_permissions(name)
+        return name
+
+    def set_permissions(self, name):
+        # temporary files are created 0600, which the web server could not read
+        os.chmod(self.path(name), self.file_permissions_mode or 0o644)
+
+
+content_addressed_storage = ContentAddressedStorage()
@@ -0,0 +1,33 @@
+from celery import shared_task
+from django.core.cache import cache
+
+from apps.common.cache import gazetteer_version
+from apps.common.gazetteer import TREE_CACHE_KEY, build_tree_snapshot
+from apps.common import resize, uploads
+from apps.common.images import generate_derivatives
+from apps.common.models import Media
+
+
+@shared_task
+def rebuild_gazetteer_tree():
+    version = gazetteer_version()
+    if cache.get(TREE_CACHE_KEY.format(version=version)) is None:
+        build_tree_snapshot(version)
+    return version
+
+
+@shared_task
+def generate_media_derivatives(media_id):
+    media = Media.objects.filter(pk=media_id).first()
+    return generate_derivatives(media) if media else 0
+
+
+@shared_task
+def purge_upload_sessions():
+    return uploads.purge_expired()
+
+
+@shared_task
+def prune_resize_cache():
+    removed, freed = resize.prune()
+    return {"removed": removed, "freed": freed}
@@ -1,3 +1,94 @@
-from django.test import TestCase
+import base64
+import json
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.common.management.commands.translate import translate_to_cyrillic, translate_to_latin
+from apps.common.models import Media
+from apps.common.paginations import PromotedKeysetPagination
+
+# (input, expected output), recorded from the original rule-by-rule implementation;
+# the compiled engine must reproduce them byte for byte
+LATIN_GOLDEN = [
+    ("Тошкент шаҳри, Юнусобод тумани, 4-мавзе", "Toshkent shahri, Yunusobod tumani, 4-mavze"),
+    ("Ўзбекистон Республикаси Президентининг фармони", "O‘zbekiston Respublikasi Prezidentining farmoni"),
+    ("Ғиждувон тумани, Шўртепа маҳалласи", "G‘ijduvon tumani, Sho‘rtepa mahallasi"),
+    (
+        "Кўчмас мулк: 3 хонали квартира, евроремонт, 12 январ 2024 йил",
+        "Ko‘chmas mulk: 3 xonali kvartira, yevroremont, 12-yanvar 2024-yil",
+    ),
+    ("«Янги ҳаёт» маҳалласи", '"Yangi hayot" mahallasi'),
+    ("цирк, концерт, эълон, съезд", "sirk, konsert, eʼlon, syezd"),
+    ("ЁШЛАР, Ёшлар, ёшлар", "YoSHLAR, Yoshlar, yoshlar"),
+    ("меценат, нуқтаи назар, таржимаи ҳол, янада", "metsenat, nuqtayi nazar, tarjimayi hol, yana-da"),
+    ("Ер, ер, Елена, поезд", "Yer, yer, Yelena, poyezd"),
+]
+
+CYRILLIC_GOLDEN = [
+    ("Toshkent", "«Тошкент»"),
+    ("Toshkent shahri, Yunusobod tumani, 4-mavze", "«Тошкент шаҳри, Юнусобод тумани, 4-мавзе»"),
+    ("Oʻzbekiston Respublikasi Prezidentining farmoni", "«Ўзбекистон Республикаси Президентининг фармони»"),
+    ("G'ijduvon tumani, Sho'rtepa mahallasi", "«Ғиждувон тумани, Шўртепа маҳалласи»"),
+    ("Gʻijduvon, Sho‘rtepa, Go`zal, O’zbek", "«Ғиждувон, Шўртепа, Гўзал, Ўзбек»"),
+    (
+        "Ko'chmas mulk: 3 xonali kvartira, yevroremont, 12-yanvar 2024 yil",
+        "«Кўчмас мулк: 3 хонали квартира, евроремонт, 12 январь 2024 йил»",
+    ),
+    (
+        'Ijara haqi oyiga 500 dollar, "Yangi hayot" mahallasi',
+        '«Ижара ҳақи ойига 500 доллар, »"«Янги ҳаёт»"« маҳалласи»',
+    ),
+    ("nuqtai nazar, tarjimai hol, yanada yaxshi, yana-da", "«нуқтаи назар, таржимаи ҳол, янада яхши, янада»"),
+    (
+        "Mo'tabar mo'jiza, MO'JIZA, sirka, prinsip, versiya, pensiya",
+        "«Мўътабар мўъжиза, МЎЪЖИЗА, сирка, принцип, версия, пенсия»",
+    ),
+    (
+        "mesenat, shtangensirkul, avtomagistral, alma-terapiya",
+        "«меценат, штангенциркуль, автомагистраль, альма-терапия»",
+    ),
+]
+
+
+class TransliterationGoldenTest(SimpleTestCase):
+    def test_to_latin(self):
+        for text, expected in LATIN_GOLDEN:
+            with self.subTest(text=text):
+                self.assertEqual(translate_to_latin(text), expected)
+
+    def test_to_cyrillic(self):
+        for text, expected in CYRILLIC_GOLDEN:
+            with self.subTest(text=text):
+                self.assertEqual(translate_to_cyrillic(text), expected)
+
+
+class UnslottedView:
+    keyset_orderings = {"default": ("-id",)}
+
+    def get_promoted_ids(self, offset, count):
+        return None  # promoted sets unavailable
+
+    def organic_queryset(self, queryset):
+        raise AssertionError("the organic part is only used while slotting")
+
+
+class PromotedKeysetPaginationFallbackTest(SimpleTestCase):
+    def paginate(self, position):
+        cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        request = Request(APIRequestFactory().get("/estate/", {"cursor": cursor}))
+        paginator = PromotedKeysetPagination()
+        page = paginator.paginate_queryset(Media.objects.none(), request, UnslottedView())
+        return paginator, page
+
+    def test_slotted_cursor_without_key_falls_back(self):
+        paginator, page = self.paginate({"key": None, "promoted": 4})
+        self.assertEqual(page, [])
+        self.assertIsNone(paginator.get_next_link())
+
+    def test_slotted_cursor_with_key_falls_back(self):
+        key = ["7f1e0c1c-3f9d-4f55-9a4b-6c2a7c0d1e2f"]
+        paginator, page = self.paginate({"key": key, "promoted": 4})
+        self.assertEqual(page, [])
+        self.assertIsNone(paginator.position)
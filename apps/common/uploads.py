@@ -0,0 +1,120 @@
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+
+from apps.common.models import Media, UploadSession
+from apps.common.utils import chunked, file_sha256, tashkent_now
+
+UPLOAD_BLOCK_SIZE = 1 << 16
+
+
+class UploadError(Exception):
+    pass
+
+
+class OffsetMismatch(UploadError):
+    def __init__(self, offset):
+        super().__init__(f"Upload offset is {offset}.")
+        self.offset = offset
+
+
+class PartialFile(File):
+    """
+    The finished partial file handed to ``FileField``; ``FileSystemStorage`` moves
+    a file that has ``temporary_file_path`` instead of copying it block by block.
+    """
+
+    def __init__(self, path, name):
+        super().__init__(open(path, "rb"), name=name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return str(self.path)
+
+
+def partial_path(session):
+    return Path(settings.UPLOAD_SESSION_ROOT) / str(session.id)
+
+
+def start(session):
+    path = partial_path(session)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+
+
+def write_chunk(session, stream, offset, length):
+    """
+    Append ``length`` bytes from ``stream`` at ``offset`` and return the new offset.
+
+    The body is copied in small blocks, so a chunk never sits in memory as a whole; the
+    caller holds a row lock on the session so concurrent chunks can't interleave.
+    If the client disconnects midway, whatever arrived is kept and the upload resumes there.
+    """
+    if offset != session.offset:
+        raise OffsetMismatch(session.offset)
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadError(f"Chunks may be at most {settings.UPLOAD_CHUNK_MAX_SIZE} bytes.")
+    if offset + length > session.file_size:
+        raise UploadError("Chunk extends past the declared file size.")
+
+    written = 0
+    with open(partial_path(session), "r+b") as partial:
+        partial.seek(offset)
+        while written < length:
+            block = stream.read(min(UPLOAD_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            partial.write(block)
+            written += len(block)
+        # drop anything a previously interrupted chunk left past the new offset
+        partial.truncate()
+
+    session.offset = offset + written
+    session.save(update_fields=["offset", "updated_at"])
+    return session.offset
+
+
+def complete(session):
+    """
+    Verify the assembled file and turn it into ``(media, created)``; an existing ``Media`` with
+    the same content is returned instead of a new one, and so is the media of a finished session.
+    """
+    if session.media_id:
+        return session.media, False
+    if session.offset != session.file_size:
+        raise UploadError(f"Only {session.offset} of {session.file_size} bytes were uploaded.")
+
+    path = partial_path(session)
+    if os.path.getsize(path) != session.file_size:
+        raise UploadError("Stored file size does not match the declared size.")
+    if session.sha256 and file_sha256(path) != session.sha256:
+        raise UploadError("SHA-256 checksum mismatch.")
+
+    with PartialFile(path, session.file_name) as content:
+        media, created = Media.objects.store(content, session.file_name)
+    path.unlink(missing_ok=True)
+
+    session.media = media
+    session.save(update_fields=["media", "updated_at"])
+    return media, created
+
+
+def abort(session):
+    partial_path(session).unlink(missing_ok=True)
+    session.delete()
+
+
+def purge_expired(batch_size=1000):
+    """Remove sessions (and their partial files) untouched for ``UPLOAD_SESSION_TTL`` seconds."""
+    expired = UploadSession.objects.filter(
+        updated_at__lt=tashkent_now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    ).values_list("pk", flat=True)
+    purged = 0
+    for pks in chunked(expired.iterator(), batch_size):
+        for pk in pks:
+            (Path(settings.UPLOAD_SESSION_ROOT) / str(pk)).unlink(missing_ok=True)
+        purged += UploadSession.objects.filter(pk__in=pks).delete()[0]
+    return purged
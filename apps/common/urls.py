@@ -9,8 +9,19 @@ urlpatterns = [
     path("region/", views.RegionListView.as_view(), name="region"),
     path("district/", views.DistrictListView.as_view(), name="district"),
     path("neighborhood/", views.NeighborhoodListView.as_view(), name="neighborhood"),
+    path("gazetteer/tree/", views.GazetteerTreeView.as_view(), name="gazetteer-tree"),
+    path("gazetteer/search/", views.GazetteerSearchView.as_view(), name="gazetteer-search"),
 
     path('media/create/', views.MediaCreateAPIView.as_view(), name='media-create'),
+    path("media/uploads/", views.UploadSessionCreateView.as_view(), name="upload-create"),
+    path("media/uploads/<uuid:pk>/", views.UploadSessionView.as_view(), name="upload-detail"),
+    path("media/uploads/<uuid:pk>/complete/", views.UploadSessionCompleteView.as_view(), name="upload-complete"),
+    path(
+        "media/<uuid:pk>/<int:width>x<int:height>.<str:fmt>",
+        views.MediaResizeView.as_view(),
+        name="media-resize",
+    ),
 
     # health checks
+    path("health/translit-cache/", views.transliteration_cache_stats, name="translit-cache-stats"),
 ]
@@ -1,3 +1,8 @@
+import hashlib
+import itertools
+import json
+import re
+
 from django.utils import timezone
 
 
@@ -7,3 +12,86 @@ def tashkent_now():
 
 def tashkent_now_str():
     return timezone.localtime(timezone.now()).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def get_client_ip(request):
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def chunked(iterable, size):
+    """Yield lists of up to ``size`` items from ``iterable`` without materialising it."""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def file_sha256(fp, block_size=1 << 20):
+    """Hex SHA-256 of an open binary file (or a path), read in blocks."""
+    if isinstance(fp, (str, bytes)) or hasattr(fp, "__fspath__"):
+        with open(fp, "rb") as source:
+            return file_sha256(source, block_size)
+    digest = hashlib.sha256()
+    while block := fp.read(block_size):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(fp, chunk_size=1 << 16):
+    """
+    Incrementally parse a top-level JSON array from a text file, yielding one element at a time.
+
+    Only a window of the file around the current element is kept in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def next_char():
+        nonlocal pos
+        while True:
+            pos = _JSON_WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer):
+                return buffer[pos]
+            read_more()
+
+    if next_char() != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    if next_char() == "]":
+        return
+
+    while True:
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as exc:
+            if eof:
+                raise ValueError("Malformed JSON array") from exc
+            read_more()
+            continue
+        if end == len(buffer) and not eof:
+            # a trailing scalar may continue in the next chunk
+            read_more()
+            continue
+
+        yield item
+        pos = end
+        char = next_char()
+        pos += 1
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+        next_char()
@@ -2,14 +2,26 @@ import redis
 from celery import Celery
 from celery.exceptions import OperationalError
 from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework.decorators import api_view
-from rest_framework.generics import ListAPIView, CreateAPIView
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.generics import ListAPIView, CreateAPIView, get_object_or_404
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from apps.common import serializers as com_ser
-from apps.common.models import Country, Region, District, Neighborhood, Media
+from apps.common import resize, uploads
+from apps.common.gazetteer import GazetteerIndex, get_search_index, get_tree_snapshot
+from apps.common.management.commands.translate import cache_stats
+from apps.common.mixins import VersionedCacheListMixin, etag_matches, negotiate_encoding
+from apps.common.models import Country, Region, District, Neighborhood, Media, FileType, UploadSession
+from apps.common.tasks import generate_media_derivatives
 
 app = Celery("core")
 app.config_from_object("django.conf:settings", namespace="CELERY")
@@ -56,34 +68,218 @@ def health_check_celery(request):
         )
 
 
-class CountryListView(ListAPIView):
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def transliteration_cache_stats(request):
+    return Response(cache_stats(), status=status.HTTP_200_OK)
+
+
+class CountryListView(VersionedCacheListMixin, ListAPIView):
     queryset = Country.objects.all()
     serializer_class = com_ser.CountryListSerializer
     search_fields = ('name',)
 
 
-class RegionListView(ListAPIView):
+class RegionListView(VersionedCacheListMixin, ListAPIView):
     queryset = Region.objects.all()
     serializer_class = com_ser.RegionListSerializer
     filterset_fields = ("country",)
     search_fields = ('name',)
 
 
-class DistrictListView(ListAPIView):
+class DistrictListView(VersionedCacheListMixin, ListAPIView):
     queryset = District.objects.all()
     serializer_class = com_ser.DistrictListSerializer
     filterset_fields = ("region",)
     search_fields = ('name',)
 
 
-class NeighborhoodListView(ListAPIView):
+class NeighborhoodListView(VersionedCacheListMixin, ListAPIView):
     queryset = Neighborhood.objects.all()
     serializer_class = com_ser.NeighborhoodListSerializer
     filterset_fields = ("district",)
     search_fields = ('name',)
 
 
+class GazetteerTreeView(APIView):
+    """
+    Whole country → region → district → neighborhood hierarchy in one response.
+
+    Levels are columnar (parallel ``id`` / parent id / ``name`` arrays) and the
+    body is served pre-compressed with brotli or gzip from the snapshot cache.
+    """
+
+    def get(self, request):
+        snapshot = get_tree_snapshot()
+        encoding = negotiate_encoding(request)
+        # every encoding is a representation of its own and needs a strong ETag of its own
+        etag = snapshot["etag"] if encoding == "identity" else f'{snapshot["etag"][:-1]}-{encoding}"'
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(snapshot[encoding], content_type="application/json")
+            if encoding != "identity":
+                response["Content-Encoding"] = encoding
+
+        response["ETag"] = etag
+        response["X-Gazetteer-Version"] = snapshot["version"]
+        patch_vary_headers(response, ("Accept-Encoding",))
+        patch_cache_control(response, private=True, max_age=settings.GAZETTEER_CACHE_MAX_AGE)
+        return response
+
+
+class GazetteerSearchView(APIView):
+    """Autocomplete over region, district and neighborhood names in Latin or Cyrillic."""
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter("type", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(GazetteerIndex.LEVELS)),
+            openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ]
+    )
+    def get(self, request):
+        level = request.query_params.get("type")
+        if level and level not in GazetteerIndex.LEVELS:
+            return Response({"type": f"Must be one of {', '.join(GazetteerIndex.LEVELS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            limit = 10
+
+        results = get_search_index().search(request.query_params.get("q", ""), limit=limit, level=level)
+        return Response(results, status=status.HTTP_200_OK)
+
+
 class MediaCreateAPIView(CreateAPIView):
     queryset = Media.objects.all()
     serializer_class = com_ser.MediaSerializer
     parser_classes = (MultiPartParser, FormParser)
+
+    def perform_create(self, serializer):
+        media = serializer.save()
+        if serializer.created:
+            process_media(media)
+
+
+def process_media(media):
+    if media.file_type == FileType.IMAGE:
+        # resizing is far too slow for the request, the worker picks it up once the row is visible
+        transaction.on_commit(lambda: generate_media_derivatives.delay(str(media.id)))
+
+
+class UploadSessionCreateView(CreateAPIView):
+    """
+    Start a resumable upload for large files (videos especially).
+
+    The client then sends the file as raw chunks of at most ``chunk_size`` bytes with
+    ``PATCH uploads/<id>/`` and an ``Upload-Offset`` header, can ask for the stored
+    offset with ``GET`` after a failure, and finishes with ``POST uploads/<id>/complete/``.
+    Each chunk is a short request streamed straight to disk, so no worker holds a whole
+    file in memory or stays tied up for the length of a slow upload.
+    """
+    serializer_class = com_ser.UploadSessionSerializer
+
+    def perform_create(self, serializer):
+        uploads.start(serializer.save(user=self.request.user))
+
+
+class UploadSessionView(APIView):
+    def get_session(self, lock=False):
+        queryset = UploadSession.objects.filter(user=self.request.user)
+        if lock:
+            queryset = queryset.select_for_update()
+        return get_object_or_404(queryset, pk=self.kwargs["pk"])
+
+    def get(self, request, pk):
+        return Response(com_ser.UploadSessionSerializer(self.get_session()).data)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter("Upload-Offset", openapi.IN_HEADER, type=openapi.TYPE_INTEGER, required=True),
+        ]
+    )
+    def patch(self, request, pk):
+        session = self.get_session(lock=True)
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.headers["Content-Length"])
+        except (KeyError, ValueError):
+            return Response({"detail": "Upload-Offset and Content-Length headers are required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if session.media_id:
+            return Response({"detail": "Upload is already complete."}, status=status.HTTP_409_CONFLICT)
+
+        # request.stream is the raw body: request.data is never touched, so no parser buffers it
+        try:
+            offset = uploads.write_chunk(session, request.stream, offset, length)
+        except uploads.OffsetMismatch as error:
+            return Response({"detail": str(error), "offset": error.offset}, status=status.HTTP_409_CONFLICT,
+                            headers={"Upload-Offset": str(error.offset)})
+        except uploads.UploadError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"offset": offset}, headers={"Upload-Offset": str(offset)})
+
+    def delete(self, request, pk):
+        uploads.abort(self.get_session(lock=True))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionCompleteView(UploadSessionView):
+    http_method_names = ["post", "options"]
+
+    def post(self, request, pk):
+        session = self.get_session(lock=True)
+        try:
+            media, created = uploads.complete(session)
+        except uploads.UploadError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        if created:
+            process_media(media)
+        return Response(
+            com_ser.MediaSerializer(media, context={"request": request}).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+class MediaResizeView(APIView):
+    """
+    ``<width>x<height>.<format>`` rendition of an image, resized on the first request and
+    kept in a size-capped disk cache (see apps.common.resize).
+
+    Media content never changes (files are content-addressed), so responses are cacheable
+    for a year. With ``MEDIA_RESIZE_ACCEL_PREFIX`` set, nginx sends the file itself via
+    ``X-Accel-Redirect`` and the worker is free as soon as the headers are out.
+    """
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    def get(self, request, pk, width, height, fmt):
+        try:
+            resize.validate(width, height, fmt)
+        except resize.ResizeError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        media = get_object_or_404(Media.objects.only("id", "file", "file_type", "sha256"), pk=pk)
+        etag = f'"{media.sha256 or media.id}-{width}x{height}.{fmt}"'
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        elif media.file_type != FileType.IMAGE:
+            return Response({"detail": "Not an image."}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            try:
+                path = resize.resized(media, width, height, fmt)
+            except resize.ResizeError as error:
+                return Response({"detail": str(error)}, status=status.HTTP_404_NOT_FOUND)
+
+            if settings.MEDIA_RESIZE_ACCEL_PREFIX:
+                response = HttpResponse(content_type=resize.CONTENT_TYPES[fmt])
+                relative = path.relative_to(resize.cache_root()).as_posix()
+                response["X-Accel-Redirect"] = f"{settings.MEDIA_RESIZE_ACCEL_PREFIX.rstrip('/')}/{relative}"
+            else:
+                response = FileResponse(open(path, "rb"), content_type=resize.CONTENT_TYPES[fmt])
+
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+        return response
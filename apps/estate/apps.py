@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EstateConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.estate'
+
+    def ready(self):
+        from apps.estate import signals  # noqa
@@ -0,0 +1,154 @@
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Coalesce, Substr
+
+from apps.ads.models import AdsStatus
+from apps.common.geo import geohash_cover
+from apps.common.utils import chunked
+from apps.estate.models import Estate, EstateCluster
+
+# finest level is ~150x150 m, beyond that the map shows individual pins (see EstateNearbyView)
+CLUSTER_PRECISION = 7
+MAX_CLUSTERS = 1000
+
+# (highest map zoom, geohash precision), so a 256px tile holds a handful of cells
+ZOOM_PRECISION = (
+    (2, 1),
+    (5, 2),
+    (7, 3),
+    (10, 4),
+    (12, 5),
+    (15, 6),
+)
+
+
+def zoom_precision(zoom):
+    for max_zoom, precision in ZOOM_PRECISION:
+        if zoom <= max_zoom:
+            return precision
+    return CLUSTER_PRECISION
+
+
+def prefix_filter(field, prefixes):
+    return reduce(or_, (Q(**{f"{field}__startswith": prefix}) for prefix in prefixes))
+
+
+def aggregate(precision, prefixes=None):
+    """
+    Unsaved clusters of one level, computed from estates for the finest level and
+    from the level below otherwise; ``prefixes`` limits them to the given cells.
+    """
+    if precision == CLUSTER_PRECISION:
+        queryset = Estate.objects.filter(is_active=True, status=AdsStatus.ACTIVE, geohash__isnull=False)
+        field = "geohash"
+        aggregates = {
+            "total": Count("id"),
+            "lat": Sum("latitude"),
+            "lon": Sum("longitude"),
+            "low": Min("price_base"),
+        }
+    else:
+        queryset = EstateCluster.objects.filter(precision=precision + 1)
+        field = "cell"
+        aggregates = {
+            "total": Sum("count"),
+            "lat": Sum("latitude_sum"),
+            "lon": Sum("longitude_sum"),
+            "low": Min("min_price"),
+        }
+
+    if prefixes is not None:
+        queryset = queryset.filter(prefix_filter(field, prefixes))
+    rows = (
+        queryset
+        .annotate(group_cell=Substr(field, 1, precision), group_purpose=Coalesce("purpose", 0))
+        .values("group_cell", "group_purpose")
+        .annotate(**aggregates)
+        .order_by()
+    )
+    for row in rows.iterator(chunk_size=5000):
+        yield EstateCluster(
+            precision=precision,
+            cell=row["group_cell"],
+            purpose=row["group_purpose"],
+            count=row["total"],
+            latitude_sum=row["lat"],
+            longitude_sum=row["lon"],
+            min_price=row["low"],
+        )
+
+
+def refresh(cells):
+    """Recompute the clusters containing the given geohashes, bottom-up, touching only those cells."""
+    cells = {cell[:CLUSTER_PRECISION] for cell in cells if cell}
+    if not cells:
+        return
+
+    with transaction.atomic():
+        for precision in range(CLUSTER_PRECISION, 0, -1):
+            prefixes = sorted({cell[:precision] for cell in cells})
+            clusters = list(aggregate(precision, prefixes))
+
+            fresh = {(cluster.cell, cluster.purpose) for cluster in clusters}
+            existing = EstateCluster.objects.filter(precision=precision, cell__in=prefixes)
+            EstateCluster.objects.filter(pk__in=[
+                pk for pk, cell, purpose in existing.values_list("pk", "cell", "purpose")
+                if (cell, purpose) not in fresh
+            ]).delete()
+
+            EstateCluster.objects.bulk_create(
+                clusters,
+                update_conflicts=True,
+                unique_fields=["precision", "cell", "purpose"],
+                update_fields=["count", "latitude_sum", "longitude_sum", "min_price", "updated_at"],
+            )
+
+
+def rebuild(batch_size=5000):
+    """Recompute every level from scratch, readers keep seeing the old clusters until commit."""
+    created = 0
+    with transaction.atomic():
+        EstateCluster.objects.all().delete()
+        for precision in range(CLUSTER_PRECISION, 0, -1):
+            for batch in chunked(aggregate(precision), batch_size):
+                EstateCluster.objects.bulk_create(batch)
+                created += len(batch)
+    return created
+
+
+def viewport_clusters(min_lat, min_lon, max_lat, max_lon, zoom, purpose=None):
+    """Clusters of the zoom's level whose centroid lies in the viewport, largest first."""
+    precision = zoom_precision(zoom)
+    cover = geohash_cover(min_lat, min_lon, max_lat, max_lon)
+
+    queryset = EstateCluster.objects.filter(precision=precision)
+    if len(cover[0]) >= precision:
+        queryset = queryset.filter(cell__in={prefix[:precision] for prefix in cover})
+    elif cover[0]:
+        queryset = queryset.filter(prefix_filter("cell", cover))
+
+    if purpose is not None:
+        queryset = queryset.filter(purpose=purpose)
+    rows = queryset.values("cell").annotate(
+        total=Sum("count"),
+        lat=Sum("latitude_sum"),
+        lon=Sum("longitude_sum"),
+        low=Min("min_price"),
+    ).order_by()
+
+    clusters = []
+    for row in rows:
+        latitude, longitude = row["lat"] / row["total"], row["lon"] / row["total"]
+        if min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon:
+            clusters.append({
+                "cell": row["cell"],
+                "count": row["total"],
+                "latitude": round(latitude, 6),
+                "longitude": round(longitude, 6),
+                "min_price": row["low"],
+            })
+    clusters.sort(key=lambda cluster: -cluster["count"])
+    return clusters[:MAX_CLUSTERS]
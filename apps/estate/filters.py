@@ -0,0 +1,55 @@
+from django_filters import rest_framework as filters
+
+from apps.ads.models import BASE_CURRENCY, Currency, ExchangeRate
+from apps.estate.models import Estate, EstateType, EstatePurpose, EstateCondition, EstateRepair, EstateQuality
+
+
+class EstateFilter(filters.FilterSet):
+    type = filters.MultipleChoiceFilter(choices=EstateType.choices)
+    purpose = filters.ChoiceFilter(choices=EstatePurpose.choices)
+    condition = filters.MultipleChoiceFilter(choices=EstateCondition.choices)
+    repair = filters.MultipleChoiceFilter(choices=EstateRepair.choices)
+    quality = filters.MultipleChoiceFilter(choices=EstateQuality.choices)
+
+    room_count = filters.RangeFilter()
+    area = filters.RangeFilter()
+    # compared against the normalized price, so UZS and USD listings are filtered together
+    price = filters.RangeFilter(method="filter_price")
+    price_currency = filters.ChoiceFilter(choices=Currency.choices, method="filter_price_currency")
+    floor_number = filters.RangeFilter()
+
+    class Meta:
+        model = Estate
+        fields = (
+            "type",
+            "purpose",
+            "condition",
+            "repair",
+            "quality",
+            "room_count",
+            "area",
+            "price",
+            "price_currency",
+            "floor_number",
+            "currency",
+            "region",
+            "district",
+            "neighborhood",
+            "is_vip",
+            "is_top",
+        )
+
+    def filter_price(self, queryset, name, value):
+        currency = self.form.cleaned_data.get("price_currency") or BASE_CURRENCY
+        rate = ExchangeRate.rates().get(int(currency))
+        if rate is None:
+            return queryset.none()
+        if value.start is not None:
+            queryset = queryset.filter(price_base__gte=value.start * rate)
+        if value.stop is not None:
+            queryset = queryset.filter(price_base__lte=value.stop * rate)
+        return queryset
+
+    def filter_price_currency(self, queryset, name, value):
+        # only changes how ``price`` bounds are read, see filter_price
+        return queryset
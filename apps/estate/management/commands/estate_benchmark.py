@@ -0,0 +1,219 @@
+import random
+import time
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+
+from apps.ads.models import AdsStatus, Currency, ExchangeRate
+from apps.common.geo import geohash_encode
+from apps.common.models import Region, District
+from apps.common.utils import chunked, tashkent_now
+from apps.estate import clusters
+from apps.estate.models import Estate, EstateType, EstatePurpose, EstateRepair, EstateQuality
+from apps.estate.views import EstateListView, EstateNearbyView, EstateClusterView
+from apps.user.models import User
+
+BENCHMARK_USERNAME = "estate-benchmark"
+
+QUERIES = (
+    ("first page", {}),
+    ("sale in region", {"purpose": EstatePurpose.SALE}),
+    ("sale in region by price", {"purpose": EstatePurpose.SALE, "price_min": 20_000, "price_max": 90_000,
+                                 "price_currency": Currency.USD}),
+    ("cheapest first", {"purpose": EstatePurpose.SALE, "ordering": "cheapest"}),
+    ("apartments, 2-3 rooms", {"purpose": EstatePurpose.RENT_LONG_TERM, "type": EstateType.APARTMENT,
+                               "room_count_min": 2, "room_count_max": 3}),
+)
+
+
+PROXIMITY_TARGET_MS = 50
+
+
+def random_point():
+    """Somewhere in Uzbekistan's bounding box."""
+    return random.uniform(37.2, 45.6), random.uniform(56.0, 73.1)
+
+
+class Command(BaseCommand):
+    help = "Seed fake estates and measure the estate listing API (keyset vs OFFSET pagination)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Create this many fake estates first")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--pages", type=int, default=50, help="Pages to walk for the deep pagination test")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--explain", action="store_true", help="Print query plans")
+        parser.add_argument("--clean", action="store_true", help="Delete the seeded estates and exit")
+
+    def handle(self, *args, **options):
+        if options["clean"]:
+            deleted, _ = Estate.all_objects.filter(user__username=BENCHMARK_USERNAME).delete()
+            self.stdout.write(self.style.SUCCESS(f"{deleted} rows deleted"))
+            return
+        if options["seed"]:
+            self.seed(options["seed"], options["batch_size"])
+
+        region = Region.objects.filter(districts__isnull=False).distinct().order_by("id").first()
+        self.stdout.write(f"{Estate.objects.count():,} estates, benchmarking on region {region}")
+
+        for title, params in QUERIES:
+            if title != "first page" and region:
+                params = {**params, "region": region.id}
+            elapsed, rows = self.measure(params, options["repeat"])
+            self.stdout.write(f"{title:>25}: {elapsed * 1000:.2f} ms/request ({rows} rows)")
+
+        self.deep_pagination(options["pages"])
+        self.proximity(options["repeat"])
+        self.clusters(options["repeat"])
+        if options["explain"]:
+            self.explain(region)
+
+    def seed(self, count, batch_size):
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        places = list(District.objects.values_list("region_id", "id")) or [(None, None)]
+        now = tashkent_now()
+        started = time.perf_counter()
+
+        def build(number):
+            region_id, district_id = random.choice(places)
+            price, currency = random.randint(5, 500) * 1000, random.choice(Currency.values)
+            latitude, longitude = random_point()
+            return Estate(
+                user=user,
+                title=f"Estate {number}",
+                slug=f"estate-{number}",
+                price=price,
+                price_base=ExchangeRate.to_base(price, currency),
+                currency=currency,
+                status=AdsStatus.ACTIVE if random.random() < 0.8 else random.choice(AdsStatus.values),
+                region_id=region_id,
+                district_id=district_id,
+                latitude=latitude,
+                longitude=longitude,
+                geohash=geohash_encode(latitude, longitude),
+                type=random.choice(EstateType.values),
+                purpose=random.choice(EstatePurpose.values),
+                repair=random.choice(EstateRepair.values),
+                quality=random.choice(EstateQuality.values),
+                room_count=random.randint(1, 6),
+                area=random.randint(20, 400),
+                floor_number=random.randint(1, 16),
+                floors_count=16,
+            )
+
+        created = 0
+        for batch in chunked(range(count), batch_size):
+            with transaction.atomic():
+                objects = Estate.objects.bulk_create([build(number) for number in batch])
+                # created_at is auto_now_add, spread it over a year so the ordering is realistic
+                for obj in objects:
+                    obj.created_at = now - timedelta(seconds=random.randint(0, 365 * 24 * 3600))
+                Estate.objects.bulk_update(objects, ["created_at"])
+            created += len(batch)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                self.style.HTTP_NOT_MODIFIED(f"{created:,} estates in {elapsed:.1f}s: {created / elapsed:,.0f} rows/sec")
+            )
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Estate._meta.db_table}")
+
+        # bulk_create sends no signals, so the map clusters are rebuilt in one go
+        started = time.perf_counter()
+        created = clusters.rebuild()
+        self.stdout.write(f"{created:,} map clusters rebuilt in {time.perf_counter() - started:.1f}s")
+
+    def measure(self, params, repeat):
+        view = EstateListView.as_view()
+        factory = RequestFactory()
+        rows = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            response = view(factory.get("/estate/", params))
+            rows = len(response.data["results"])
+        return (time.perf_counter() - started) / repeat, rows
+
+    def deep_pagination(self, pages):
+        """Walk ``pages`` pages with the keyset cursor and time the last one against an OFFSET query."""
+        view = EstateListView.as_view()
+        factory = RequestFactory()
+        params, page_size = {"per_page": 100}, 100
+
+        started = time.perf_counter()
+        for _ in range(pages):
+            response = view(factory.get("/estate/", params))
+            next_link = response.data["next"]
+            if not next_link:
+                break
+            params = {**params, "cursor": parse_qs(urlparse(next_link).query)["cursor"][0]}
+        walked = time.perf_counter() - started
+
+        queryset = EstateListView.queryset.order_by("-created_at", "-id")
+        started = time.perf_counter()
+        list(queryset[pages * page_size:(pages + 1) * page_size])
+        offset = time.perf_counter() - started
+
+        started = time.perf_counter()
+        view(factory.get("/estate/", params))
+        keyset = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{pages} pages walked in {walked:.2f}s; page {pages + 1}: keyset {keyset * 1000:.2f} ms, "
+            f"OFFSET {offset * 1000:.2f} ms"
+        )
+
+    def proximity(self, repeat):
+        """Radius and viewport queries around random points, compared against the latency target."""
+        view = EstateNearbyView.as_view()
+        factory = RequestFactory()
+        cases = [(f"radius {radius} km", {"radius": radius}) for radius in (1, 5, 25)]
+        cases.append(("viewport 0.2x0.2", {"bbox": 0.2}))
+
+        for title, params in cases:
+            timings, rows = [], 0
+            for _ in range(repeat):
+                latitude, longitude = random_point()
+                if "bbox" in params:
+                    span = params["bbox"] / 2
+                    query = {"bbox": f"{longitude - span},{latitude - span},{longitude + span},{latitude + span}"}
+                else:
+                    query = {"lat": latitude, "lon": longitude, **params}
+                started = time.perf_counter()
+                response = view(factory.get("/estate/nearby/", query))
+                timings.append(time.perf_counter() - started)
+                rows += len(response.data)
+            timings.sort()
+            p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)] * 1000
+            style = self.style.SUCCESS if p95 < PROXIMITY_TARGET_MS else self.style.ERROR
+            self.stdout.write(style(
+                f"{title:>25}: {sum(timings) / len(timings) * 1000:.2f} ms avg, {p95:.2f} ms p95, "
+                f"{rows / len(timings):.0f} rows avg"
+            ))
+
+    def clusters(self, repeat):
+        """Cluster requests for viewports from the whole country down to a city block."""
+        view = EstateClusterView.as_view()
+        factory = RequestFactory()
+        for zoom, span in ((5, 18.0), (8, 2.0), (11, 0.3), (14, 0.04)):
+            timings, rows = [], 0
+            for _ in range(repeat):
+                latitude, longitude = random_point()
+                bbox = f"{longitude - span / 2},{latitude - span / 4},{longitude + span / 2},{latitude + span / 4}"
+                started = time.perf_counter()
+                response = view(factory.get("/estate/clusters/", {"bbox": bbox, "zoom": zoom}))
+                timings.append(time.perf_counter() - started)
+                rows += len(response.data)
+            self.stdout.write(
+                f"{'clusters at zoom ' + str(zoom):>25}: {sum(timings) / len(timings) * 1000:.2f} ms avg, "
+                f"{rows / len(timings):.0f} clusters avg"
+            )
+
+    def explain(self, region):
+        queryset = EstateListView.queryset.filter(purpose=EstatePurpose.SALE, region=region)
+        for ordering in (("-created_at", "-id"), ("price_base", "id")):
+            plan = queryset.order_by(*ordering)[:21].explain(analyze=connection.vendor == "postgresql")
+            self.stdout.write(f"{', '.join(ordering)}:\n{plan}\n")
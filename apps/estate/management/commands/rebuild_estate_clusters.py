@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.estate.clusters import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute all map cluster levels from the listed estates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = rebuild(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"{created} clusters created in {time.perf_counter() - started:.1f}s")
+        )
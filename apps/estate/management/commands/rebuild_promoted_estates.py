@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.estate.promoted import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the Redis rankings of promoted (VIP/TOP) estates, e.g. after a deploy or a Redis flush"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = rebuild(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"{total} promoted estates ranked in {time.perf_counter() - started:.1f}s")
+        )
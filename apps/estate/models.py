@@ -1,7 +1,9 @@
 from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
 
-from apps.ads.models import Ads
+from apps.ads.models import Ads, AdsStatus
+
+LISTED = models.Q(is_deleted=False, is_active=True, status=AdsStatus.ACTIVE)
 
 
 class EstateType(models.IntegerChoices):
@@ -75,6 +77,57 @@ class Estate(Ads):
     class Meta:
         indexes = [
             models.Index(fields=["type", "purpose"]),
+            # Meta does not inherit Ads.Meta, so the base indexes are declared here as well
+            models.Index(fields=["price"]),
+            models.Index(fields=["region", "district"]),
+            models.Index(fields=["vip_expiry_date"], condition=models.Q(is_vip=True), name="estate_vip_expiry_idx"),
+            models.Index(fields=["top_expiry_date"], condition=models.Q(is_top=True), name="estate_top_expiry_idx"),
+            models.Index(fields=["expiry_date"], condition=models.Q(status=AdsStatus.ACTIVE), name="estate_expiry_idx"),
+            # partial indexes below only cover listed (active, not deleted) estates and match
+            # the keyset order of the listing, so filtered pages are index range scans
+            models.Index(fields=["-created_at", "-id"], condition=LISTED, name="estate_listed_feed_idx"),
+            models.Index(
+                fields=["purpose", "region", "-created_at", "-id"], condition=LISTED, name="estate_listed_region_idx"
+            ),
+            models.Index(fields=["purpose", "region", "price_base"], condition=LISTED, name="estate_listed_price_idx"),
+            models.Index(fields=["price_base", "id"], condition=LISTED, name="estate_listed_base_price_idx"),
+            models.Index(
+                fields=["purpose", "type", "room_count", "-created_at"], condition=LISTED, name="estate_listed_rooms_idx"
+            ),
         ]
         verbose_name = "Estate"
         verbose_name_plural = "Estates"
+
+
+class EstateCluster(models.Model):
+    """
+    Listed estates aggregated per geohash cell, one row per (precision, cell, purpose).
+
+    The finest level is aggregated from estates, every coarser level from the level below,
+    so the map only reads a few hundred of these rows per viewport.
+    """
+
+    precision = models.PositiveSmallIntegerField()
+    cell = models.CharField(max_length=12)
+    purpose = models.PositiveSmallIntegerField(default=0)  # 0 when the estate has no purpose
+    count = models.PositiveIntegerField(default=0)
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+    min_price = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["precision", "cell", "purpose"], name="estate_cluster_unique"),
+        ]
+        indexes = [
+            # prefix (LIKE 'abc%') lookups on cell within one precision
+            models.Index(
+                fields=["precision", "cell"], name="estate_cluster_cell_idx", opclasses=["int2_ops", "varchar_pattern_ops"]
+            ),
+        ]
+        verbose_name = "Estate cluster"
+        verbose_name_plural = "Estate clusters"
+
+    def __str__(self):
+        return f"{self.cell} ({self.count})"
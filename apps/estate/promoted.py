@@ -0,0 +1,150 @@
+"""
+Precomputed ranking of promoted (VIP/TOP) estates for the listing feed.
+
+Every promoted estate is a member of four sorted sets: its (region, purpose), its region
+for any purpose, its purpose in any region and the whole country, so any combination of
+the two listing filters is one ZREVRANGE. The score puts VIP before TOP and newer before
+older. ``PLACEMENT_KEY`` remembers which sets an estate is in, so a change of region or
+purpose can take it out of the old ones. ``BUILT_KEY`` marks sets that were built from
+the database; until they are (first deploy, flushed Redis), the feed is not slotted and
+a rebuild is queued.
+"""
+import logging
+import uuid
+
+import redis
+from django.conf import settings
+from django.db.models import Q
+
+from apps.ads.models import AdsStatus
+from apps.estate.models import Estate
+
+ANY = "*"
+PROMOTED_KEY = "promoted:estate:{region}:{purpose}"
+PLACEMENT_KEY = "promoted:estate:placement"
+BUILT_KEY = "promoted:estate:built"
+REBUILD_LOCK_KEY = "promoted:estate:rebuild-lock"
+REBUILD_LOCK_TIMEOUT = 10 * 60
+REBUILD_SUFFIX = ":rebuild"
+TIER_WEIGHT = 10 ** 10  # larger than any epoch timestamp in seconds, so the tier always decides first
+
+PROMOTION_FIELDS = ("pk", "region_id", "purpose", "is_vip", "is_top", "status", "is_active", "is_deleted", "created_at")
+
+logger = logging.getLogger(__name__)
+
+redis_client = redis.StrictRedis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
+)
+
+
+def promoted_key(region=None, purpose=None):
+    return PROMOTED_KEY.format(region=region or ANY, purpose=purpose or ANY)
+
+
+def placement_keys(placement):
+    region, purpose = placement.split(":")
+    return [promoted_key(r, p) for r in {region, ANY} for p in {purpose, ANY}]
+
+
+def promotion(row):
+    """``(placement, score)`` of an estate values row, ``None`` when it is not promoted (or not listed)."""
+    listed = row["is_active"] and not row["is_deleted"] and row["status"] == AdsStatus.ACTIVE
+    if not listed or not (row["is_vip"] or row["is_top"]):
+        return None
+    placement = f"{row['region_id'] or ANY}:{row['purpose'] or ANY}"
+    tier = 2 if row["is_vip"] else 1
+    return placement, tier * TIER_WEIGHT + row["created_at"].timestamp()
+
+
+def refresh(pks):
+    """Move the given estates into, between or out of the promoted sets according to their current state."""
+    pks = [str(pk) for pk in pks]
+    if not pks:
+        return
+    rows = {str(row["pk"]): row for row in Estate.all_objects.filter(pk__in=pks).values(*PROMOTION_FIELDS)}
+    previous = dict(zip(pks, redis_client.hmget(PLACEMENT_KEY, pks)))
+
+    pipeline = redis_client.pipeline(transaction=True)
+    for pk in pks:
+        if previous[pk]:
+            for key in placement_keys(previous[pk].decode()):
+                pipeline.zrem(key, pk)
+        current = promotion(rows[pk]) if pk in rows else None
+        if current is None:
+            pipeline.hdel(PLACEMENT_KEY, pk)
+            continue
+        placement, score = current
+        for key in placement_keys(placement):
+            pipeline.zadd(key, {pk: score})
+        pipeline.hset(PLACEMENT_KEY, pk, placement)
+    pipeline.execute()
+
+
+def rebuild(batch_size=5000):
+    """
+    Recompute every set from the database into fresh keys and swap them in atomically;
+    repairs drift from updates that bypassed the signals.
+    """
+    promoted = Estate.all_objects.filter(
+        Q(is_vip=True) | Q(is_top=True), is_active=True, is_deleted=False, status=AdsStatus.ACTIVE
+    )
+
+    keys, total = set(), 0
+    pipeline = redis_client.pipeline(transaction=False)
+    for row in promoted.values(*PROMOTION_FIELDS).iterator(chunk_size=batch_size):
+        placement, score = promotion(row)
+        pk = str(row["pk"])
+        for key in placement_keys(placement):
+            pipeline.zadd(key + REBUILD_SUFFIX, {pk: score})
+            keys.add(key)
+        pipeline.hset(PLACEMENT_KEY + REBUILD_SUFFIX, pk, placement)
+        total += 1
+        if len(pipeline) >= batch_size:
+            pipeline.execute()
+    pipeline.execute()
+
+    existing = {key.decode() for key in redis_client.scan_iter(promoted_key("*", "*"))}
+    stale = {key for key in existing if not key.endswith(REBUILD_SUFFIX)} - keys
+    swap = redis_client.pipeline(transaction=True)
+    for key in keys:
+        swap.rename(key + REBUILD_SUFFIX, key)
+    if total:
+        swap.rename(PLACEMENT_KEY + REBUILD_SUFFIX, PLACEMENT_KEY)
+    else:
+        swap.delete(PLACEMENT_KEY)
+    for key in stale:
+        swap.delete(key)
+    swap.set(BUILT_KEY, 1)
+    swap.execute()
+    return total
+
+
+def schedule_rebuild():
+    """Queue ``rebuild`` unless one was queued within ``REBUILD_LOCK_TIMEOUT``."""
+    from apps.estate.tasks import rebuild_promoted_estates
+
+    if redis_client.set(REBUILD_LOCK_KEY, 1, nx=True, ex=REBUILD_LOCK_TIMEOUT):
+        rebuild_promoted_estates.delay()
+
+
+def promoted_ids(region=None, purpose=None, offset=0, count=0):
+    """
+    ``count`` promoted estate ids from ``offset`` on, best ranked first; ``None`` when the
+    sets can't be trusted (not built yet, Redis down), the feed then paginates unslotted.
+    """
+    if count <= 0:
+        return []
+    try:
+        pipeline = redis_client.pipeline(transaction=False)
+        pipeline.exists(BUILT_KEY)
+        pipeline.zrevrange(promoted_key(region, purpose), offset, offset + count - 1)
+        built, members = pipeline.execute()
+        if not built:
+            schedule_rebuild()
+            return None
+    except redis.RedisError:
+        logger.warning("Promoted estates unavailable, listing without slots", exc_info=True)
+        return None
+    return [uuid.UUID(member.decode()) for member in members]
@@ -0,0 +1,106 @@
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import serializers
+
+from apps.ads.serializers import EngagementStateMixin, MainImageMixin, RatingSummaryMixin
+from apps.ads.tracking import unique_views
+from apps.estate.models import Estate, EstatePurpose
+
+
+class EstateListSerializer(EngagementStateMixin, RatingSummaryMixin, MainImageMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Estate
+        fields = (
+            "id",
+            "title",
+            "slug",
+            "price",
+            "price_base",
+            "currency",
+            "type",
+            "purpose",
+            "condition",
+            "repair",
+            "quality",
+            "room_count",
+            "area",
+            "floor_number",
+            "floors_count",
+            "region",
+            "district",
+            "neighborhood",
+            "address",
+            "latitude",
+            "longitude",
+            "is_vip",
+            "is_top",
+            "created_at",
+            "main_image",
+            "engagement",
+            "rating",
+        )
+
+
+class EstateDetailSerializer(EstateListSerializer):
+    # distinct visitors, anonymous included, from the HyperLogLog in Redis (see apps.ads.tracking)
+    unique_views = serializers.SerializerMethodField()
+
+    class Meta(EstateListSerializer.Meta):
+        fields = EstateListSerializer.Meta.fields + ("description", "facilities", "user", "unique_views")
+
+    def get_unique_views(self, obj):
+        return unique_views(ContentType.objects.get_for_model(Estate).id, obj.pk)
+
+
+class EstateNearbySerializer(EstateListSerializer):
+    distance = serializers.SerializerMethodField()
+
+    class Meta(EstateListSerializer.Meta):
+        fields = EstateListSerializer.Meta.fields + ("distance",)
+
+    def get_distance(self, obj):
+        distance = getattr(obj, "distance", None)
+        return round(distance, 3) if distance is not None else None
+
+
+class BboxField(serializers.CharField):
+    """``min_lon,min_lat,max_lon,max_lat`` parsed into ``(min_lat, min_lon, max_lat, max_lon)``."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("help_text", "min_lon,min_lat,max_lon,max_lat")
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            min_lon, min_lat, max_lon, max_lat = map(float, super().to_internal_value(data).split(","))
+        except ValueError:
+            raise serializers.ValidationError("Expected min_lon,min_lat,max_lon,max_lat")
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+            raise serializers.ValidationError("Invalid bounding box")
+        return min_lat, min_lon, max_lat, max_lon
+
+
+class EstateNearbyQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    lon = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    radius = serializers.FloatField(min_value=0.01, max_value=100, default=5, help_text="Radius in km")
+    bbox = BboxField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=100)
+
+    def validate(self, attrs):
+        if "bbox" not in attrs and ("lat" not in attrs or "lon" not in attrs):
+            raise serializers.ValidationError("Either lat and lon or bbox is required")
+        return attrs
+
+
+class EstateClusterQuerySerializer(serializers.Serializer):
+    bbox = BboxField()
+    zoom = serializers.IntegerField(min_value=0, max_value=22)
+    purpose = serializers.ChoiceField(choices=EstatePurpose.choices, required=False)
+
+
+class EstateClusterSerializer(serializers.Serializer):
+    cell = serializers.CharField()
+    count = serializers.IntegerField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+    min_price = serializers.DecimalField(max_digits=18, decimal_places=2, allow_null=True)
@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.ads.expiry import expired
+from apps.ads.moderation import moderated
+from apps.common.managers import restored, soft_deleted
+from apps.estate.clusters import CLUSTER_PRECISION
+from apps.estate.models import Estate
+from apps.estate.tasks import refresh_estate_clusters, refresh_promoted_estates
+
+# fields that decide whether and how an estate is counted in the map clusters
+CLUSTER_FIELDS = ("geohash", "purpose", "status", "is_active", "is_deleted", "price_base")
+# fields that decide whether and where an estate is ranked in the promoted feed
+PROMOTION_FIELDS = ("region_id", "purpose", "is_vip", "is_top", "status", "is_active", "is_deleted")
+
+
+def cluster_state(instance):
+    # __dict__ instead of getattr so that deferred fields are not loaded
+    return tuple(instance.__dict__.get(field) for field in CLUSTER_FIELDS)
+
+
+def promotion_state(instance):
+    return tuple(instance.__dict__.get(field) for field in PROMOTION_FIELDS)
+
+
+def schedule_cluster_refresh(geohashes):
+    cells = sorted({geohash[:CLUSTER_PRECISION] for geohash in geohashes if geohash})
+    if cells:
+        transaction.on_commit(lambda: refresh_estate_clusters.delay(cells))
+
+
+def schedule_promoted_refresh(pks):
+    pks = [str(pk) for pk in pks]
+    if pks:
+        transaction.on_commit(lambda: refresh_promoted_estates.delay(pks))
+
+
+@receiver(post_init, sender=Estate)
+def remember_cluster_state(sender, instance, **kwargs):
+    instance._cluster_state = cluster_state(instance)
+    instance._promotion_state = promotion_state(instance)
+
+
+@receiver(post_save, sender=Estate)
+def estate_saved(sender, instance, created, **kwargs):
+    previous, current = instance._promotion_state, promotion_state(instance)
+    if previous != current or created:
+        instance._promotion_state = current
+        if current[2] or current[3] or previous[2] or previous[3]:
+            schedule_promoted_refresh([instance.pk])
+
+    previous, current = instance._cluster_state, cluster_state(instance)
+    if previous == current and not created:
+        return
+    instance._cluster_state = current
+    schedule_cluster_refresh({previous[0], current[0]})
+
+
+@receiver(post_delete, sender=Estate)
+def estate_deleted(sender, instance, **kwargs):
+    schedule_cluster_refresh({instance.geohash})
+    if instance.is_vip or instance.is_top:
+        schedule_promoted_refresh([instance.pk])
+
+
+@receiver(soft_deleted, sender=Estate)
+@receiver(restored, sender=Estate)
+def estates_soft_deleted(sender, pks, **kwargs):
+    rows = list(Estate.all_objects.filter(pk__in=pks).values_list("pk", "geohash", "is_vip", "is_top"))
+    schedule_cluster_refresh({geohash for _, geohash, _, _ in rows})
+    schedule_promoted_refresh([pk for pk, _, is_vip, is_top in rows if is_vip or is_top])
+
+
+@receiver(expired, sender=Estate)
+def estates_expired(sender, pks, rule, **kwargs):
+    # every rule can take an estate out of the promoted feed, only the end of its lifetime changes the clusters
+    schedule_promoted_refresh(pks)
+    if rule == "lifetime":
+        schedule_cluster_refresh(set(Estate.all_objects.filter(pk__in=pks).values_list("geohash", flat=True)))
+
+
+@receiver(moderated, sender=Estate)
+def estates_moderated(sender, pks, **kwargs):
+    rows = list(Estate.all_objects.filter(pk__in=pks).values_list("pk", "geohash", "is_vip", "is_top"))
+    schedule_cluster_refresh({geohash for _, geohash, _, _ in rows})
+    schedule_promoted_refresh([pk for pk, _, is_vip, is_top in rows if is_vip or is_top])
@@ -0,0 +1,23 @@
+from celery import shared_task
+
+from apps.estate import clusters, promoted
+
+
+@shared_task
+def refresh_estate_clusters(cells):
+    clusters.refresh(cells)
+
+
+@shared_task
+def rebuild_estate_clusters():
+    return clusters.rebuild()
+
+
+@shared_task
+def refresh_promoted_estates(pks):
+    promoted.refresh(pks)
+
+
+@shared_task
+def rebuild_promoted_estates():
+    return promoted.rebuild()
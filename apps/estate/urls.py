@@ -0,0 +1,14 @@
+from django.urls import path
+
+from apps.estate import views
+
+app_name = "estate"
+
+urlpatterns = [
+    path("", views.EstateListView.as_view(), name="estate-list"),
+    path("<uuid:pk>/", views.EstateDetailView.as_view(), name="estate-detail"),
+    path("<uuid:pk>/comments/", views.EstateCommentListView.as_view(), name="estate-comments"),
+    path("<uuid:pk>/comments/<uuid:root_id>/", views.EstateCommentThreadView.as_view(), name="estate-comment-thread"),
+    path("nearby/", views.EstateNearbyView.as_view(), name="estate-nearby"),
+    path("clusters/", views.EstateClusterView.as_view(), name="estate-clusters"),
+]
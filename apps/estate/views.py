@@ -1,3 +1,189 @@
-from django.shortcuts import render
+from django.contrib.contenttypes.models import ContentType
+from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.generics import ListAPIView, ListCreateAPIView, RetrieveAPIView
+from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from apps.ads.comments import CommentThreadPagination, thread, top_level_comments
+from apps.ads.models import AdsStatus, main_image_prefetch
+from apps.ads.serializers import CommentCreateSerializer, CommentSerializer, CommentThreadSerializer
+from apps.ads.tracking import record_view
+from apps.common.geo import nearby, within_bbox
+from apps.common.models import Project
+from apps.common.paginations import PromotedKeysetPagination
+from apps.common.utils import get_client_ip
+from apps.estate import promoted
+from apps.estate.clusters import viewport_clusters
+from apps.estate.filters import EstateFilter
+from apps.estate.models import Estate
+from apps.estate.serializers import (
+    EstateListSerializer,
+    EstateDetailSerializer,
+    EstateNearbySerializer,
+    EstateNearbyQuerySerializer,
+    EstateClusterQuerySerializer,
+    EstateClusterSerializer,
+)
+
+
+class EstateListView(ListAPIView):
+    """
+    Listing feed: VIP and TOP estates of the requested region/purpose fill fixed slots of
+    every page (ranked in Redis, see apps.estate.promoted), the rest is keyset-paginated.
+    """
+
+    queryset = Estate.objects.filter(is_active=True, status=AdsStatus.ACTIVE)
+    serializer_class = EstateListSerializer
+    permission_classes = (AllowAny,)
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = EstateFilter
+    pagination_class = PromotedKeysetPagination
+    keyset_orderings = {
+        "newest": ("-created_at", "-id"),
+        "cheapest": ("price_base", "id"),
+        "expensive": ("-price_base", "-id"),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset().prefetch_related(main_image_prefetch())
+        if self.request.query_params.get("ordering") in ("cheapest", "expensive"):
+            # ads without a known exchange rate have no normalized price and can't be keyset-paginated by it
+            queryset = queryset.filter(price_base__isnull=False)
+        return queryset
+
+    def get_promoted_ids(self, offset, count):
+        params = self.request.query_params
+        # asking for VIP/TOP explicitly (or not) is a plain filtered listing
+        if "is_vip" in params or "is_top" in params:
+            return None
+        try:
+            region = int(params["region"]) if params.get("region") else None
+            purpose = int(params["purpose"]) if params.get("purpose") else None
+        except ValueError:
+            return None
+        return promoted.promoted_ids(region, purpose, offset, count)
+
+    def organic_queryset(self, queryset):
+        return queryset.filter(is_vip=False, is_top=False)
+
+
+class EstateDetailView(RetrieveAPIView):
+    queryset = Estate.objects.filter(is_active=True, status=AdsStatus.ACTIVE).prefetch_related(
+        "facilities", main_image_prefetch()
+    )
+    serializer_class = EstateDetailSerializer
+    permission_classes = (AllowAny,)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        # buffered in Redis and flushed to View by a periodic task, see apps.ads.tracking
+        record_view(
+            ContentType.objects.get_for_model(Estate).id,
+            instance.pk,
+            user_id=request.user.pk if request.user.is_authenticated else None,
+            ip_address=get_client_ip(request),
+        )
+        return Response(self.get_serializer(instance).data)
+
+
+class EstateNearbyView(ListAPIView):
+    """
+    Estates around a point (``lat``, ``lon``, ``radius`` in km) sorted by distance,
+    or inside a map viewport (``bbox``) sorted by date. Accepts the listing filters too.
+    """
+
+    queryset = Estate.objects.filter(is_active=True, status=AdsStatus.ACTIVE).prefetch_related(main_image_prefetch())
+    serializer_class = EstateNearbySerializer
+    permission_classes = (AllowAny,)
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = EstateFilter
+    pagination_class = None
+
+    @swagger_auto_schema(query_serializer=EstateNearbyQuerySerializer)
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        params = EstateNearbyQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if "bbox" in params:
+            queryset = within_bbox(queryset, *params["bbox"]).order_by("-created_at", "-id")
+        else:
+            queryset = nearby(queryset, params["lat"], params["lon"], params["radius"])
+
+        serializer = self.get_serializer(queryset[:params["limit"]], many=True)
+        return Response(serializer.data)
+
+
+class EstateClusterView(APIView):
+    """Map clusters (count, centroid, lowest price) for a viewport, read from the precomputed EstateCluster levels."""
+
+    permission_classes = (AllowAny,)
+
+    @swagger_auto_schema(
+        query_serializer=EstateClusterQuerySerializer,
+        responses={200: EstateClusterSerializer(many=True)},
+    )
+    def get(self, request):
+        params = EstateClusterQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        clusters = viewport_clusters(*params["bbox"], zoom=params["zoom"], purpose=params.get("purpose"))
+        return Response(EstateClusterSerializer(clusters, many=True).data, status=status.HTTP_200_OK)
+
+
+class EstateCommentMixin:
+    def get_estate(self):
+        if not hasattr(self, "_estate"):
+            self._estate = get_object_or_404(EstateListView.queryset, pk=self.kwargs["pk"])
+        return self._estate
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["content_type"] = ContentType.objects.get_for_model(Estate)
+        context["object_id"] = self.get_estate().pk
+        return context
+
+
+class EstateCommentListView(EstateCommentMixin, ListCreateAPIView):
+    """Top-level comments, newest first, each with its first ``replies`` replies; POST adds a comment or reply."""
+
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+    filter_backends = ()
+    pagination_class = CommentThreadPagination
+
+    def get_queryset(self):
+        return top_level_comments(ContentType.objects.get_for_model(Estate), self.get_estate().pk)
+
+    def get_serializer_class(self):
+        if self.request.method == "POST":
+            return CommentCreateSerializer
+        return CommentThreadSerializer
+
+    def perform_create(self, serializer):
+        serializer.save(
+            user=self.request.user,
+            project=Project.ESTATE,
+            content_type=ContentType.objects.get_for_model(Estate),
+            object_id=self.get_estate().pk,
+        )
+
+
+class EstateCommentThreadView(EstateCommentMixin, ListAPIView):
+    """A whole thread depth-first; ``depth`` and ``parent`` are enough to indent it."""
+
+    serializer_class = CommentSerializer
+    permission_classes = (AllowAny,)
+    filter_backends = ()
+    pagination_class = None
+
+    def get_queryset(self):
+        return thread(self.kwargs["root_id"]).filter(object_id=self.get_estate().pk)
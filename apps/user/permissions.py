@@ -0,0 +1,9 @@
+from rest_framework.permissions import BasePermission
+
+from apps.user.models import Role
+
+
+class IsModerator(BasePermission):
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_staff or user.role in (Role.MODERATOR, Role.ADMIN)))
@@ -3,6 +3,7 @@ from datetime import timedelta
 from pathlib import Path
 
 import environ
+from celery.schedules import crontab
 
 from core.jazzmin_conf import *  # noqa
 
@@ -152,6 +153,31 @@ STATICFILES_DIRS = (BASE_DIR / "staticfiles",)
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# resized copies generated for every uploaded image, bounding boxes in pixels
+MEDIA_DERIVATIVE_SIZES = {
+    "thumbnail": (320, 320),
+    "card": (800, 600),
+    "full": (1920, 1920),
+}
+MEDIA_DERIVATIVE_FORMATS = env.list("MEDIA_DERIVATIVE_FORMATS", default=["webp", "jpeg"])  # add "avif" if supported
+MEDIA_DERIVATIVE_QUALITY = env.int("MEDIA_DERIVATIVE_QUALITY", 80)
+
+# resumable uploads, partial files live under MEDIA_ROOT so completing one is a rename
+UPLOAD_SESSION_ROOT = MEDIA_ROOT / "partial"
+UPLOAD_MAX_SIZE = env.int("UPLOAD_MAX_SIZE", 2 * 1024 ** 3)
+UPLOAD_CHUNK_MAX_SIZE = env.int("UPLOAD_CHUNK_MAX_SIZE", 8 * 1024 ** 2)
+UPLOAD_SESSION_TTL = env.int("UPLOAD_SESSION_TTL", 24 * 60 * 60)
+
+# on-the-fly resizes (media/<id>/<w>x<h>.<fmt>), least recently used files are pruned above the size cap
+MEDIA_RESIZE_CACHE_ROOT = env.str("MEDIA_RESIZE_CACHE_ROOT", str(BASE_DIR / "cache" / "resized"))
+MEDIA_RESIZE_CACHE_MAX_SIZE = env.int("MEDIA_RESIZE_CACHE_MAX_SIZE", 5 * 1024 ** 3)
+MEDIA_RESIZE_DIMENSIONS = (64, 128, 160, 240, 320, 480, 640, 800, 960, 1280, 1600, 1920)
+# internal nginx location aliased to MEDIA_RESIZE_CACHE_ROOT, files are streamed by Django when empty
+MEDIA_RESIZE_ACCEL_PREFIX = env.str("MEDIA_RESIZE_ACCEL_PREFIX", "")
+
+# moderation queue: how long claimed items stay with a moderator before they return to the queue
+MODERATION_LEASE_SECONDS = env.int("MODERATION_LEASE_SECONDS", 15 * 60)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -166,6 +192,29 @@ CACHES = {
     }
 }
 
+# TRANSLITERATION CACHE
+TRANSLIT_CACHE_MAX_ENTRIES = env.int("TRANSLIT_CACHE_MAX_ENTRIES", 20_000)
+TRANSLIT_CACHE_MAX_CHARS = env.int("TRANSLIT_CACHE_MAX_CHARS", 2_000_000)
+TRANSLIT_CACHE_MAX_LENGTH = env.int("TRANSLIT_CACHE_MAX_LENGTH", 256)  # longer texts are not cached
+TRANSLIT_CACHE_REDIS = env.bool("TRANSLIT_CACHE_REDIS", False)
+TRANSLIT_CACHE_ALIAS = "default"
+TRANSLIT_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+# GAZETTEER CACHE
+GAZETTEER_CACHE_TIMEOUT = 24 * 60 * 60  # entries are also invalidated by version bumps
+GAZETTEER_CACHE_MAX_AGE = env.int("GAZETTEER_CACHE_MAX_AGE", 60 * 60)  # Cache-Control max-age for clients
+
+# RATINGS
+RATING_PRIOR_WEIGHT = env.int("RATING_PRIOR_WEIGHT", 10)  # votes at the mean added to every Bayesian score
+RATING_PRIOR_MEAN = 3.5  # used until refresh_rating_scores has computed the real mean
+
+# VIEW TRACKING
+# unique-view HyperLogLogs expire this long after the last view of the object
+VIEW_UNIQUE_TTL = env.int("VIEW_UNIQUE_TTL", 90 * 24 * 60 * 60)
+
+# EXCHANGE RATES
+EXCHANGE_RATES_URL = env.str("EXCHANGE_RATES_URL", "https://cbu.uz/uz/arkhiv-kursov-valyut/json/")
+
 REDIS_HOST = env.str("REDIS_HOST", "localhost")
 REDIS_PORT = env.int("REDIS_PORT", 6379)
 REDIS_DB = env.int("REDIS_DB", 0)
@@ -179,6 +228,41 @@ CELERY_TIMEZONE = "Asia/Tashkent"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 
+CELERY_BEAT_SCHEDULE = {
+    "update-exchange-rates": {
+        "task": "apps.ads.tasks.update_exchange_rates",
+        "schedule": crontab(minute=5),
+    },
+    "expire-ads": {
+        "task": "apps.ads.tasks.expire_ads",
+        "schedule": 60.0,
+    },
+    "flush-views": {
+        "task": "apps.ads.tasks.flush_views",
+        "schedule": 30.0,
+    },
+    "refresh-rating-scores": {
+        "task": "apps.ads.tasks.refresh_rating_scores",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "rebuild-estate-clusters": {
+        "task": "apps.estate.tasks.rebuild_estate_clusters",
+        "schedule": crontab(hour=4, minute=30),
+    },
+    "rebuild-promoted-estates": {
+        "task": "apps.estate.tasks.rebuild_promoted_estates",
+        "schedule": crontab(hour=4, minute=45),
+    },
+    "prune-resize-cache": {
+        "task": "apps.common.tasks.prune_resize_cache",
+        "schedule": crontab(minute="*/10"),
+    },
+    "purge-upload-sessions": {
+        "task": "apps.common.tasks.purge_upload_sessions",
+        "schedule": crontab(minute=45),
+    },
+}
+
 AUTH_USER_MODEL = 'user.User'
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
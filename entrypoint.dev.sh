@@ -8,4 +8,5 @@ pip install -r requirements/develop.txt
 
 python manage.py makemigrations
 python manage.py migrate
+python manage.py rebuild_promoted_estates
 python manage.py runserver 0.0.0.0:8000